@@ -0,0 +1,238 @@
+# app/core/answer_keys.py
+
+import random
+import threading
+from array import array
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+
+from app.core.bank import bank_version, changed_question_ids
+from app.core.database import read_engine
+from app.models.models import Question
+
+# --- Answer Key Index ---
+# Question ids are dense autoincrement integers, so the index is two flat
+# arrays addressed directly by id instead of a dict of row objects:
+#   keys[id]      -> ord(correct_answer_key), 0 if the id does not exist
+#   topic_of[id]  -> position of the question's topic in `topics`
+# plus, per topic, a sorted array of its question ids for O(count) sampling.
+# When a shared snapshot is configured the same arrays are views into its
+# memory mapping instead of per-process copies.
+NO_TOPIC = 0xFFFFFFFF
+
+# Above this many changed ids a full reload is cheaper than an IN (...) query
+REFRESH_FULL_RELOAD_THRESHOLD = 5000
+
+
+class AnswerKeys:
+    """
+    One immutable version of the index. Readers take a reference once and
+    use only that, so a concurrent refresh (which builds a new AnswerKeys and
+    swaps it in) can never mix arrays from two versions.
+    """
+
+    __slots__ = ("version", "keys", "topic_of", "topics", "topic_ids", "topic_questions")
+
+    def __init__(self, version: Optional[int], keys, topic_of, topics: List[str], topic_ids: Dict[str, int], topic_questions):
+        self.version = version
+        self.keys = keys
+        self.topic_of = topic_of
+        self.topics = topics
+        self.topic_ids = topic_ids
+        self.topic_questions = topic_questions
+
+    def has_topic(self, topic: str) -> bool:
+        topic_id = self.topic_ids.get(topic)
+        return topic_id is not None and len(self.topic_questions[topic_id]) > 0
+
+    def sample_question_ids(self, topic: str, count: int, seed: int) -> Optional[List[int]]:
+        """
+        Pick `count` random question ids of `topic` (fewer if the topic is
+        smaller). The same seed gives the same ids while the topic is unchanged.
+        Returns None for unknown or empty topics.
+        """
+        topic_id = self.topic_ids.get(topic)
+        if topic_id is None or not len(self.topic_questions[topic_id]):
+            return None
+        question_ids = self.topic_questions[topic_id]
+        return random.Random(seed).sample(question_ids, min(count, len(question_ids)))
+
+    def grade(self, topic: str, answers: Iterable[Tuple[int, str]], outcomes: Optional[list] = None) -> Dict:
+        """
+        Grade (question_id, answer_key) pairs for `topic`.
+        Ids that are unknown or belong to another topic are not scored and are
+        reported in `invalid_question_ids`; repeated ids are only scored once
+        and reported in `duplicate_question_ids`.
+        If `outcomes` is given, a (question_id, answer, correct_key, is_correct)
+        tuple is appended to it for every scored answer.
+        """
+        topic_id = self.topic_ids.get(topic)
+        keys, topic_of, size = self.keys, self.topic_of, len(self.keys)
+
+        seen: Set[int] = set()
+        duplicates: List[int] = []
+        invalid: List[int] = []
+        correct_count = 0
+
+        for q_id, answer in answers:
+            if q_id in seen:
+                duplicates.append(q_id)
+                continue
+            seen.add(q_id)
+            if topic_id is None or not 0 < q_id < size or topic_of[q_id] != topic_id or not keys[q_id]:
+                invalid.append(q_id)
+                continue
+            answer = answer.upper()
+            is_correct = len(answer) == 1 and ord(answer) == keys[q_id]
+            if is_correct:
+                correct_count += 1
+            if outcomes is not None:
+                outcomes.append((q_id, answer, chr(keys[q_id]), is_correct))
+
+        total_questions = len(seen) - len(invalid)
+        return {
+            "topic": topic,
+            "score": correct_count,
+            "total_questions": total_questions,
+            "percentage": (correct_count / total_questions) * 100 if total_questions else 0,
+            "duplicate_question_ids": duplicates,
+            "invalid_question_ids": invalid,
+        }
+
+
+class _Builder:
+    """Mutable working copy used to produce the next AnswerKeys."""
+
+    def __init__(self, base: Optional[AnswerKeys] = None):
+        if base is None:
+            self.keys = bytearray()
+            self.topic_of = array("I")
+            self.topics: List[str] = []
+            self.topic_ids: Dict[str, int] = {}
+            self.topic_questions: List[array] = []
+        else:
+            self.keys = bytearray(base.keys)
+            self.topic_of = array("I", base.topic_of)
+            self.topics = list(base.topics)
+            self.topic_ids = dict(base.topic_ids)
+            # Per-topic id arrays are copied only when a change touches them
+            self.topic_questions = list(base.topic_questions)
+        self._copied: Set[int] = set()
+
+    def _questions(self, topic_id: int) -> array:
+        if topic_id not in self._copied:
+            self.topic_questions[topic_id] = array("I", self.topic_questions[topic_id])
+            self._copied.add(topic_id)
+        return self.topic_questions[topic_id]
+
+    def _topic_id(self, topic: str) -> int:
+        topic_id = self.topic_ids.get(topic)
+        if topic_id is None:
+            topic_id = len(self.topics)
+            self.topics.append(topic)
+            self.topic_ids[topic] = topic_id
+            self.topic_questions.append(array("I"))
+            self._copied.add(topic_id)
+        return topic_id
+
+    def _grow(self, max_id: int) -> None:
+        missing = max_id + 1 - len(self.keys)
+        if missing > 0:
+            self.keys.extend(bytes(missing))
+            self.topic_of.extend([NO_TOPIC] * missing)
+
+    def store(self, rows: Iterable[Tuple[int, str, str]]) -> None:
+        for q_id, topic, correct_key in rows:
+            self._grow(q_id)
+            topic_id = self._topic_id(topic)
+            self.keys[q_id] = ord(correct_key)
+            self.topic_of[q_id] = topic_id
+            insort(self._questions(topic_id), q_id)
+
+    def clear(self, q_id: int) -> None:
+        if q_id >= len(self.keys) or self.topic_of[q_id] == NO_TOPIC:
+            return
+        question_ids = self._questions(self.topic_of[q_id])
+        pos = bisect_left(question_ids, q_id)
+        if pos < len(question_ids) and question_ids[pos] == q_id:
+            del question_ids[pos]
+        self.keys[q_id] = 0
+        self.topic_of[q_id] = NO_TOPIC
+
+    def build(self, version: Optional[int]) -> AnswerKeys:
+        return AnswerKeys(version, self.keys, self.topic_of, self.topics, self.topic_ids, self.topic_questions)
+
+
+class AnswerKeyIndex:
+    """
+    In-memory question id -> (topic, correct key) lookup used for grading
+    and quiz sampling. Loaded once at startup and refreshed from the
+    `bank_changes` log whenever the bank version moves. In snapshot mode
+    requests use the snapshot's own AnswerKeys instead.
+    """
+
+    def __init__(self):
+        self._state: Optional[AnswerKeys] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._state is not None
+
+    def _select(self):
+        return select(Question.id, Question.topic_name, Question.correct_answer_key)
+
+    def load(self) -> AnswerKeys:
+        """(Re)build the whole index from the questions table."""
+        # Read the version first: rows written meanwhile are re-read on the next refresh
+        version = bank_version()
+        with read_engine.connect() as conn:
+            rows = conn.execute(self._select().order_by(Question.id)).all()
+        builder = _Builder()
+        builder.store(rows)
+        self._state = state = builder.build(version)
+        return state
+
+    def refresh(self) -> AnswerKeys:
+        """Catch up with the current bank version, re-reading only the changed questions if possible."""
+        state, version = self._state, bank_version()
+        if state is None or state.version == version:
+            return state or self.load()
+        question_ids = changed_question_ids(state.version, version, REFRESH_FULL_RELOAD_THRESHOLD)
+        if question_ids is None:
+            return self.load()
+
+        with read_engine.connect() as conn:
+            rows = conn.execute(self._select().where(Question.id.in_(question_ids))).all()
+        builder = _Builder(state)
+        # Clear first so deleted ids drop out, then re-store what still exists
+        for q_id in question_ids:
+            builder.clear(q_id)
+        builder.store(rows)
+        self._state = state = builder.build(version)
+        return state
+
+    def current(self, snapshot=None) -> AnswerKeys:
+        """
+        The AnswerKeys to use for one request, brought up to date if the bank
+        changed. Pass the request's snapshot (if any) so grading and sampling
+        use the same bank as the rest of the request.
+        """
+        if snapshot is not None:
+            return snapshot.answer_keys
+
+        state = self._state
+        if state is not None and state.version == bank_version():
+            return state
+        # One thread refreshes; the others keep grading against the previous version meanwhile
+        if not self._lock.acquire(blocking=state is None):
+            return state
+        try:
+            return self.refresh()
+        finally:
+            self._lock.release()
+
+
+answer_key_index = AnswerKeyIndex()
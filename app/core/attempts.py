@@ -0,0 +1,129 @@
+# app/core/attempts.py
+
+import logging
+import queue
+import threading
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy import insert
+
+from app.core.database import engine
+from app.core.metrics import ATTEMPT_FLUSH_RETRIES, ATTEMPTS_DROPPED
+from app.models.models import Attempt
+
+logger = logging.getLogger(__name__)
+
+# --- Write-Behind Attempt Queue ---
+# Submissions hand their attempt rows to a background thread which commits
+# them in batches: a flush happens once FLUSH_ROWS rows are buffered or
+# FLUSH_INTERVAL seconds after the first buffered row, whichever is first.
+# Queue entries are one submission, or one batch-endpoint chunk of submissions
+ATTEMPT_QUEUE_MAX_SUBMISSIONS = 10_000
+ATTEMPT_FLUSH_ROWS = 1_000
+ATTEMPT_FLUSH_INTERVAL = 0.5  # seconds
+# How long a request waits for queue space before it is rejected
+ATTEMPT_ENQUEUE_TIMEOUT = 0.05  # seconds
+# A failed commit is retried with exponential backoff (0.1s, 0.2s, ... capped
+# at 2s) before the batch is dropped; meanwhile the queue keeps filling, so
+# a stuck database turns into 503 backpressure rather than silent loss
+ATTEMPT_FLUSH_ATTEMPTS = 6
+ATTEMPT_RETRY_BACKOFF = 0.1  # seconds
+ATTEMPT_RETRY_BACKOFF_MAX = 2.0  # seconds
+
+_STOP = object()
+
+
+class AttemptQueueFull(Exception):
+    """Raised when the writer is too far behind to accept more attempts."""
+
+
+class AttemptWriter:
+    """Buffers attempt rows in a bounded queue and group-commits them."""
+
+    def __init__(
+        self,
+        max_submissions: int = ATTEMPT_QUEUE_MAX_SUBMISSIONS,
+        flush_rows: int = ATTEMPT_FLUSH_ROWS,
+        flush_interval: float = ATTEMPT_FLUSH_INTERVAL,
+    ):
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_submissions)
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="attempt-writer", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Flush everything still queued and stop the writer thread."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def submit(self, rows: List[Dict]) -> None:
+        """Queue the attempt rows of one submission (or one batch chunk); raises AttemptQueueFull on backpressure."""
+        if not rows:
+            return
+        self.start()
+        try:
+            self._queue.put(rows, timeout=ATTEMPT_ENQUEUE_TIMEOUT)
+        except queue.Full:
+            raise AttemptQueueFull()
+
+    def _run(self) -> None:
+        buffered: List[Dict] = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                self._flush(buffered)
+                return
+            if item is not None:
+                if not buffered:
+                    deadline = time.monotonic() + self.flush_interval
+                buffered.extend(item)
+
+            if buffered and (len(buffered) >= self.flush_rows or time.monotonic() >= deadline):
+                self._flush(buffered)
+                buffered = []
+                deadline = None
+
+    def _flush(self, rows: List[Dict]) -> None:
+        if not rows:
+            return
+        delay = ATTEMPT_RETRY_BACKOFF
+        for attempt in range(1, ATTEMPT_FLUSH_ATTEMPTS + 1):
+            try:
+                # One transaction and one executemany for the whole batch
+                with engine.begin() as conn:
+                    conn.execute(insert(Attempt), rows)
+                return
+            except Exception as e:
+                error = e
+            if attempt < ATTEMPT_FLUSH_ATTEMPTS:
+                ATTEMPT_FLUSH_RETRIES.inc()
+                logger.warning(
+                    "Failed to persist %d quiz attempts (try %d of %d): %s; retrying in %.1fs",
+                    len(rows), attempt, ATTEMPT_FLUSH_ATTEMPTS, error, delay,
+                )
+                time.sleep(delay)
+                delay = min(delay * 2, ATTEMPT_RETRY_BACKOFF_MAX)
+
+        ATTEMPTS_DROPPED.inc(amount=len(rows))
+        logger.error(
+            "Dropping %d quiz attempts after %d failed tries", len(rows), ATTEMPT_FLUSH_ATTEMPTS, exc_info=error
+        )
+
+
+attempt_writer = AttemptWriter()
@@ -0,0 +1,159 @@
+# app/core/bank.py
+
+import threading
+import time
+from typing import Optional, Set
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from app.core import config
+from app.core.database import engine, read_engine
+
+# --- Question Bank Version ---
+# Every committed write to `questions` appends the question's id to the
+# `bank_changes` log. Triggers do the logging, so ORM writes, the bulk importer
+# and other processes (CLI imports, other uvicorn workers) are all covered.
+# The bank version is the log's last sequence number. Read-side caches compare
+# against it to know when their copy of the bank is stale, and can use the log
+# to refresh only the questions that changed.
+
+# Log entries kept for incremental refreshes; older ones are pruned by a trigger
+BANK_CHANGES_KEEP = 100_000
+
+BANK_CHANGES_DDL = (
+    """
+    CREATE TABLE IF NOT EXISTS bank_changes (
+        version INTEGER PRIMARY KEY AUTOINCREMENT,
+        question_id INTEGER NOT NULL
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS bank_changes_ai AFTER INSERT ON questions BEGIN
+        INSERT INTO bank_changes(question_id) VALUES (new.id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS bank_changes_ad AFTER DELETE ON questions BEGIN
+        INSERT INTO bank_changes(question_id) VALUES (old.id);
+    END
+    """,
+    # Re-importing an unchanged question is an upsert no-op, not a change
+    """
+    CREATE TRIGGER IF NOT EXISTS bank_changes_au AFTER UPDATE ON questions
+    WHEN old.topic_name IS NOT new.topic_name OR old.text IS NOT new.text
+      OR old.option_a IS NOT new.option_a OR old.option_b IS NOT new.option_b
+      OR old.option_c IS NOT new.option_c OR old.option_d IS NOT new.option_d
+      OR old.correct_answer_key IS NOT new.correct_answer_key
+    BEGIN
+        INSERT INTO bank_changes(question_id) VALUES (old.id);
+        INSERT INTO bank_changes(question_id) SELECT new.id WHERE new.id != old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS bank_changes_prune AFTER INSERT ON bank_changes
+    WHEN new.version % 1000 = 0 BEGIN
+        DELETE FROM bank_changes WHERE version <= new.version - {BANK_CHANGES_KEEP};
+    END
+    """,
+)
+
+# Last version read from the database (None until the first read), and when
+_version: Optional[int] = None
+_checked_at = float("-inf")
+_version_lock = threading.Lock()
+# Databases without the trigger-maintained log (non-SQLite) fall back to a
+# per-process counter bumped by this process's own writes
+_local_version = 0
+
+_CHANGED_KEY = "questions_changed"
+
+
+def create_change_log(bind=engine) -> None:
+    """Create the `bank_changes` log and its triggers if missing."""
+    if bind.dialect.name != "sqlite":
+        return
+    with bind.begin() as conn:
+        for statement in BANK_CHANGES_DDL:
+            conn.exec_driver_sql(statement)
+
+
+def _read_version() -> int:
+    if read_engine.dialect.name != "sqlite":
+        return _local_version
+    with read_engine.connect() as conn:
+        return conn.scalar(text("SELECT coalesce(max(version), 0) FROM bank_changes"))
+
+
+def bank_version() -> int:
+    """
+    Return the current question bank version. It is re-read from the database
+    at most every QUIZ_BANK_VERSION_TTL seconds, so writes from other
+    processes are seen within that delay; this process's own writes are seen
+    immediately.
+    """
+    global _version, _checked_at
+    if time.monotonic() - _checked_at < config.QUIZ_BANK_VERSION_TTL:
+        return _version
+
+    with _version_lock:
+        if time.monotonic() - _checked_at < config.QUIZ_BANK_VERSION_TTL:
+            return _version
+        _version, _checked_at = _read_version(), time.monotonic()
+        return _version
+
+
+def changed_question_ids(since: int, until: int, limit: int = 5000) -> Optional[Set[int]]:
+    """
+    Ids of the questions changed between two versions, or None when the log
+    can't tell (entries already pruned, more than `limit` ids, or no log).
+    """
+    if read_engine.dialect.name != "sqlite":
+        return None
+    with read_engine.connect() as conn:
+        ids = conn.scalars(
+            text(
+                "SELECT DISTINCT question_id FROM bank_changes "
+                "WHERE version > :since AND version <= :until LIMIT :limit"
+            ),
+            {"since": since, "until": until, "limit": limit + 1},
+        ).all()
+        # Checked after reading: pruning only moves forward, so if `since` is
+        # still covered now, nothing we needed was pruned before the read
+        oldest = conn.scalar(text("SELECT min(version) FROM bank_changes"))
+    if oldest is None or oldest > since + 1 or len(ids) > limit:
+        return None
+    return set(ids)
+
+
+def expire_bank_version() -> None:
+    """
+    Make the next bank_version() call re-read the database. ORM writes do this
+    automatically on commit; bulk/Core writes (e.g. the importer) call it
+    after committing so this process sees its own write without waiting.
+    """
+    global _checked_at, _local_version
+    with _version_lock:
+        _checked_at = float("-inf")
+        _local_version += 1
+
+
+@event.listens_for(Session, "after_flush")
+def _track_question_writes(session, flush_context):
+    """Remember whether this transaction touched any Question rows."""
+    from app.models.models import Question
+
+    if any(isinstance(obj, Question) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info[_CHANGED_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _expire_on_commit(session):
+    """Re-read the version once the write is visible to other connections."""
+    if session.info.pop(_CHANGED_KEY, False):
+        expire_bank_version()
+
+
+@event.listens_for(Session, "after_rollback")
+def _reset_on_rollback(session):
+    session.info.pop(_CHANGED_KEY, None)
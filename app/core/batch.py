@@ -0,0 +1,190 @@
+# app/core/batch.py
+
+import codecs
+import json
+from typing import AsyncIterator, Callable, Dict, List, NamedTuple, Tuple, Type, Union
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
+
+# --- Batch Grading ---
+# Submissions are parsed, graded and written back in chunks of this size so
+# memory stays bounded by the chunk, not by the size of the request body.
+BATCH_CHUNK_SIZE = 500
+
+_WHITESPACE = " \t\r\n"
+# Longest tail a cut-off token can leave after the decoder's error position
+# (e.g. "-Infinit", a partial \uXXXX escape, a number's exponent)
+_MAX_PARTIAL_TOKEN = 16
+
+
+class RequestStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body is produced while the request body is still
+    being read. The stock class listens for disconnects by calling `receive()`
+    concurrently, which would steal request body chunks from the generator;
+    here a disconnect surfaces as a failed `send()` instead.
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+        if self.background is not None:
+            await self.background()
+
+
+class MalformedDocument(NamedTuple):
+    """Stands in for an NDJSON line that isn't valid JSON; graded as an error line."""
+    error: str
+
+
+def _is_incomplete(buffer: str, error: json.JSONDecodeError) -> bool:
+    """
+    True if the decode error may just mean the buffer ends mid-document.
+    Cut-off literals, numbers and escapes fail within a few characters of the
+    end, and a cut-off string fails where the string starts; anything else is
+    malformed however many more bytes arrive.
+    """
+    if error.msg.startswith("Unterminated string"):
+        return True
+    return len(buffer) - error.pos <= _MAX_PARTIAL_TOKEN
+
+
+async def iter_json_documents(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, object]]:
+    """
+    Incrementally decode a JSON array of objects or an NDJSON stream.
+    Yields (index, document) pairs as soon as each document is complete.
+    An NDJSON line that isn't valid JSON is yielded as a MalformedDocument and
+    decoding continues with the next line; a malformed array raises
+    JSONDecodeError, since there is no reliable point to resume from.
+    Either way only the current document is buffered, never the rest of the body.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    in_array = None  # unknown until the first non-whitespace character
+    index = 0
+    eof = False
+
+    while True:
+        if not eof:
+            try:
+                chunk = await chunks.__anext__()
+                buffer += utf8.decode(chunk)
+            except StopAsyncIteration:
+                buffer += utf8.decode(b"", final=True)
+                eof = True
+
+        pos = 0
+        if in_array is None:
+            stripped = buffer.lstrip(_WHITESPACE)
+            if stripped:
+                in_array = stripped[0] == "["
+                pos = len(buffer) - len(stripped) + (1 if in_array else 0)
+
+        if in_array is False:
+            # NDJSON: one document per line, each decoded on its own
+            while True:
+                end = buffer.find("\n", pos)
+                if end == -1:
+                    if not eof:
+                        break
+                    end = len(buffer)
+                line = buffer[pos:end].strip(_WHITESPACE)
+                pos = min(end + 1, len(buffer))
+                if line:
+                    try:
+                        yield index, json.loads(line)
+                    except json.JSONDecodeError as e:
+                        yield index, MalformedDocument(f"Malformed JSON on line {index + 1}: {e}")
+                    index += 1
+                if pos == len(buffer):
+                    break
+
+        elif in_array:
+            while True:
+                # Skip whitespace and the separators between documents
+                while pos < len(buffer) and buffer[pos] in _WHITESPACE + ",":
+                    pos += 1
+                if pos == len(buffer):
+                    break
+                if buffer[pos] == "]":
+                    return
+                try:
+                    document, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError as e:
+                    if eof or not _is_incomplete(buffer, e):
+                        raise
+                    break  # incomplete document, wait for more bytes
+                yield index, document
+                index += 1
+                pos = end
+
+        buffer = buffer[pos:]
+        if eof:
+            if in_array:
+                # The closing "]" returns above, so the body was cut off
+                raise json.JSONDecodeError("Unterminated JSON array", buffer, len(buffer))
+            return
+
+
+def _grade_chunk(
+    chunk: List[Tuple[int, object]],
+    request_model: Type[BaseModel],
+    grade: Callable[[List[BaseModel]], List[Union[Dict, HTTPException]]],
+) -> bytes:
+    """Validate one chunk, grade its valid submissions in one call, and return its NDJSON lines."""
+    lines: Dict[int, Dict] = {}
+    valid: List[Tuple[int, BaseModel]] = []
+    for index, document in chunk:
+        if isinstance(document, MalformedDocument):
+            lines[index] = {"index": index, "error": document.error}
+            continue
+        try:
+            valid.append((index, request_model.model_validate(document)))
+        except ValidationError as e:
+            lines[index] = {"index": index, "error": e.errors(include_url=False, include_context=False)}
+
+    if valid:
+        outcomes = grade([submission for _, submission in valid])
+        for (index, _), outcome in zip(valid, outcomes):
+            if isinstance(outcome, HTTPException):
+                lines[index] = {"index": index, "error": outcome.detail}
+            else:
+                lines[index] = {"index": index, "results": outcome}
+
+    encoded = [json.dumps(lines[index], separators=(",", ":")) for index, _ in chunk]
+    return ("\n".join(encoded) + "\n").encode("utf-8")
+
+
+async def stream_batch_results(
+    chunks: AsyncIterator[bytes],
+    request_model: Type[BaseModel],
+    grade: Callable[[List[BaseModel]], List[Union[Dict, HTTPException]]],
+    chunk_size: int = BATCH_CHUNK_SIZE,
+) -> AsyncIterator[bytes]:
+    """
+    Grade a stream of submissions and yield one NDJSON result line per
+    submission, in input order. `grade` is called once per chunk with the
+    validated `request_model` instances and returns one result dict (or
+    HTTPException) per submission.
+    """
+    pending: List[Tuple[int, object]] = []
+    try:
+        async for item in iter_json_documents(chunks):
+            pending.append(item)
+            if len(pending) >= chunk_size:
+                yield await run_in_threadpool(_grade_chunk, pending, request_model, grade)
+                pending = []
+        if pending:
+            yield await run_in_threadpool(_grade_chunk, pending, request_model, grade)
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        # Headers are already sent, so report malformed input as a final line
+        if pending:
+            yield await run_in_threadpool(_grade_chunk, pending, request_model, grade)
+        yield (json.dumps({"error": f"Malformed batch body: {e}"}, separators=(",", ":")) + "\n").encode("utf-8")
@@ -0,0 +1,135 @@
+# app/core/cache.py
+
+import threading
+from collections import OrderedDict
+from typing import Callable, List, NamedTuple, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.bank import bank_version
+from app.core.http_cache import EncodedBody
+from app.core.quizzes import QUESTION_COLUMNS, dumps, question_dicts
+from app.models.models import Question
+
+# --- Topic Payload Cache ---
+# Upper bound for all cached payload bytes (both variants of every topic).
+TOPIC_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+class TopicPayload(NamedTuple):
+    version: int
+    questions: EncodedBody  # QuizResponse body, no correct answers
+    answers: EncodedBody    # QuizForResultResponse body, with correct answers
+
+    @property
+    def size(self) -> int:
+        return self.questions.size + self.answers.size
+
+
+def build_topic_payload(db: Session, topic: str, version: int) -> Optional[TopicPayload]:
+    """
+    Load a topic with a single column query (no ORM hydration) and encode
+    and compress both response variants. Returns None if the topic has no
+    questions.
+    """
+    rows = db.execute(
+        select(*QUESTION_COLUMNS).where(Question.topic_name == topic).order_by(Question.id)
+    ).all()
+    if not rows:
+        return None
+
+    return TopicPayload(
+        version=version,
+        questions=EncodedBody(
+            dumps({"topic_name": topic, "questions": question_dicts(topic, rows, with_answers=False)}),
+            precompress=True,
+        ),
+        answers=EncodedBody(
+            dumps({"topic_name": topic, "questions": question_dicts(topic, rows, with_answers=True)}),
+            precompress=True,
+        ),
+    )
+
+
+class TopicCache:
+    """
+    Bounded LRU of pre-serialized topic payloads.
+    Entries are tagged with the bank version they were built from and are
+    rebuilt on the next read after any write to the `questions` table.
+    """
+
+    def __init__(self, max_bytes: int = TOPIC_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, TopicPayload]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, topic: str, build: Callable[[int], Optional[TopicPayload]]) -> Optional[TopicPayload]:
+        """Return the cached payload for `topic`, building it on a miss."""
+        # Read the version before building so a concurrent write marks the new entry stale
+        version = bank_version()
+        with self._lock:
+            entry = self._entries.get(topic)
+            if entry is not None and entry.version == version:
+                self._entries.move_to_end(topic)
+                return entry
+
+        entry = build(version)
+        if entry is None:
+            # Unknown topics are not cached, so random names can't evict real ones
+            self.discard(topic)
+            return None
+
+        with self._lock:
+            old = self._entries.pop(topic, None)
+            if old is not None:
+                self._size -= old.size
+            if entry.size <= self.max_bytes:
+                self._entries[topic] = entry
+                self._size += entry.size
+                while self._size > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._size -= evicted.size
+        return entry
+
+    def discard(self, topic: str) -> None:
+        with self._lock:
+            old = self._entries.pop(topic, None)
+            if old is not None:
+                self._size -= old.size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+topic_cache = TopicCache()
+
+
+def get_topic_payload(db: Session, topic: str, snapshot=None) -> Optional[TopicPayload]:
+    """Cached lookup used by the quiz endpoints; `snapshot` is the request's shared snapshot, if any."""
+    if snapshot is not None:
+        # Bodies are pre-encoded in the shared snapshot; nothing to build or cache per worker
+        bodies = snapshot.topic_bodies(topic)
+        return TopicPayload(0, *bodies) if bodies else None
+    return topic_cache.get(topic, lambda version: build_topic_payload(db, topic, version))
+
+
+# The topic list is a single small body, cached for the current bank version
+_topics_body = (None, None)  # (version, EncodedBody)
+
+
+def get_topics_body(build: Callable[[], List[str]], snapshot=None) -> EncodedBody:
+    """Cached /topics body; `build` returns the topic names on a miss."""
+    global _topics_body
+    if snapshot is not None:
+        return snapshot.topics_body
+    version = bank_version()
+    cached_version, body = _topics_body
+    if cached_version != version:
+        body = EncodedBody(dumps({"topics": build()}), precompress=True)
+        _topics_body = (version, body)
+    return body
+
@@ -0,0 +1,46 @@
+# app/core/config.py
+
+import os
+
+# --- Environment Configuration ---
+# Every setting can be overridden with the environment variable of the same
+# name; the defaults match a single-node deployment with a local SQLite file.
+
+
+def _int(name: str, default: int) -> int:
+    return int(os.environ.get(name, default))
+
+
+# Database location (any SQLAlchemy URL; file-based SQLite gets the tuned profile)
+QUIZ_DATABASE_URL = os.environ.get("QUIZ_DATABASE_URL", "sqlite:///./anup.db")
+
+# SQLite pragmas applied to every new connection
+QUIZ_SQLITE_JOURNAL_MODE = os.environ.get("QUIZ_SQLITE_JOURNAL_MODE", "WAL")
+QUIZ_SQLITE_SYNCHRONOUS = os.environ.get("QUIZ_SQLITE_SYNCHRONOUS", "NORMAL")
+QUIZ_SQLITE_CACHE_SIZE_KB = _int("QUIZ_SQLITE_CACHE_SIZE_KB", 64 * 1024)
+QUIZ_SQLITE_MMAP_SIZE = _int("QUIZ_SQLITE_MMAP_SIZE", 256 * 1024 * 1024)
+QUIZ_SQLITE_BUSY_TIMEOUT_MS = _int("QUIZ_SQLITE_BUSY_TIMEOUT_MS", 5000)
+
+# Read-only connection pool used by the GET endpoints
+QUIZ_READ_POOL_SIZE = _int("QUIZ_READ_POOL_SIZE", 8)
+QUIZ_READ_POOL_MAX_OVERFLOW = _int("QUIZ_READ_POOL_MAX_OVERFLOW", 8)
+# Seconds to wait for a free connection (readers and the single writer)
+QUIZ_POOL_TIMEOUT = float(os.environ.get("QUIZ_POOL_TIMEOUT", "30"))
+
+# Warn when worker startup (DB init + in-memory indexes) exceeds this budget
+QUIZ_STARTUP_BUDGET_MS = float(os.environ.get("QUIZ_STARTUP_BUDGET_MS", "1000"))
+
+# Cache-Control for question endpoints; ETags let CDNs and browsers revalidate cheaply
+QUIZ_CACHE_CONTROL = os.environ.get("QUIZ_CACHE_CONTROL", "public, max-age=60, stale-while-revalidate=300")
+
+# How long (seconds) a worker trusts its last read of the question bank version;
+# writes from other processes (CLI imports, other workers) show up within this delay
+QUIZ_BANK_VERSION_TTL = float(os.environ.get("QUIZ_BANK_VERSION_TTL", "0.5"))
+
+# Log requests slower than this (with the SQL they issued); 0 disables the log
+QUIZ_SLOW_REQUEST_MS = float(os.environ.get("QUIZ_SLOW_REQUEST_MS", "0"))
+
+# Compiled, memory-mapped question bank shared by all workers; empty disables it
+QUIZ_SNAPSHOT_PATH = os.environ.get("QUIZ_SNAPSHOT_PATH", "")
+# How often (seconds) workers check whether a new snapshot was published
+QUIZ_SNAPSHOT_CHECK_INTERVAL = float(os.environ.get("QUIZ_SNAPSHOT_CHECK_INTERVAL", "1.0"))
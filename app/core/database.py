@@ -1,23 +1,90 @@
 # app/core/database.py
 
-from sqlalchemy import create_engine
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
 
+from app.core import config
+from app.core.metrics import TimedQueuePool, instrument_engine
+
 # --- Database Setup ---
-# Configuration to use a SQLite file named 'anup.db'
-SQLALCHEMY_DATABASE_URL = "sqlite:///./anup.db"
+# Configured via QUIZ_DATABASE_URL (defaults to a SQLite file named 'anup.db')
+SQLALCHEMY_DATABASE_URL = config.QUIZ_DATABASE_URL
 
-# Create the engine, necessary for SQLite in multi-threaded environments (like FastAPI)
+_url = make_url(SQLALCHEMY_DATABASE_URL)
+_is_sqlite_file = _url.get_backend_name() == "sqlite" and _url.database not in (None, "", ":memory:")
+
+# Writer engine: a single pooled connection, so all writes are serialized
+# in-process instead of contending for SQLite's write lock.
+# check_same_thread=False is necessary for SQLite in multi-threaded environments (like FastAPI)
 engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False} if _url.get_backend_name() == "sqlite" else {},
+    **(dict(poolclass=TimedQueuePool, pool_size=1, max_overflow=0, pool_timeout=config.QUIZ_POOL_TIMEOUT)
+       if _is_sqlite_file else {}),
 )
 
-# Configure a SessionLocal class to create sessions
+if _is_sqlite_file:
+    # Read engine: read-only connections to the same file, pooled for the GET
+    # endpoints. In WAL mode they never block (or get blocked by) the writer.
+    read_engine = create_engine(
+        _url.set(database=f"file:{_url.database}", query={"mode": "ro", "uri": "true"}),
+        connect_args={"check_same_thread": False},
+        poolclass=TimedQueuePool,
+        pool_size=config.QUIZ_READ_POOL_SIZE,
+        max_overflow=config.QUIZ_READ_POOL_MAX_OVERFLOW,
+        pool_timeout=config.QUIZ_POOL_TIMEOUT,
+    )
+
+    def _apply_pragmas(dbapi_connection, writer: bool):
+        cursor = dbapi_connection.cursor()
+        if writer:
+            # journal_mode is persistent in the file; only the writer may change it
+            cursor.execute(f"PRAGMA journal_mode = {config.QUIZ_SQLITE_JOURNAL_MODE}")
+            cursor.execute(f"PRAGMA synchronous = {config.QUIZ_SQLITE_SYNCHRONOUS}")
+        else:
+            cursor.execute("PRAGMA query_only = 1")
+        cursor.execute(f"PRAGMA cache_size = {-int(config.QUIZ_SQLITE_CACHE_SIZE_KB)}")
+        cursor.execute(f"PRAGMA mmap_size = {int(config.QUIZ_SQLITE_MMAP_SIZE)}")
+        cursor.execute(f"PRAGMA busy_timeout = {int(config.QUIZ_SQLITE_BUSY_TIMEOUT_MS)}")
+        cursor.close()
+
+    @event.listens_for(engine, "connect")
+    def _on_writer_connect(dbapi_connection, connection_record):
+        _apply_pragmas(dbapi_connection, writer=True)
+
+    @event.listens_for(read_engine, "connect")
+    def _on_reader_connect(dbapi_connection, connection_record):
+        _apply_pragmas(dbapi_connection, writer=False)
+
+    engine.pool.metrics_name = "write"
+    read_engine.pool.metrics_name = "read"
+    instrument_engine(engine, "write")
+    instrument_engine(read_engine, "read")
+else:
+    # In-memory or non-SQLite databases: one engine serves both roles
+    read_engine = engine
+    instrument_engine(engine, "default")
+
+# Configure session classes: SessionLocal writes, ReadSessionLocal only reads
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 
 # Base class for declarative models (all models inherit from this)
 Base = declarative_base()
 
+# Stamped into `PRAGMA user_version` once tables exist and the bank is seeded.
+# Bump it whenever the schema changes so existing databases get re-initialized.
+SCHEMA_VERSION = 4
+
 
 def get_db():
     """
@@ -31,94 +98,113 @@ def get_db():
         db.close()
 
 
-def setup_database():
+def get_read_db():
+    """
+    Dependency for read-only endpoints: a session on the read connection pool.
+    Any write through it fails (the connections are opened read-only).
+    """
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def setup_database() -> bool:
     """
     Initializes the database: creates tables if they don't exist,
     and seeds initial quiz data if the Question table is empty.
+    Returns True if the database is ready to be stamped.
     """
     # Import models to ensure they are registered with Base.metadata
     from app.models import models
+    from app.core.importer import ensure_unique_index
+    from app.core.search import create_search_index
+    from app.core.bank import create_change_log
     # Create tables defined in the models file
     Base.metadata.create_all(bind=engine)
+    # Databases created before the importer existed lack the dedupe index
+    ensure_unique_index(engine)
+    # Full-text index over question text and options, kept in sync by triggers
+    create_search_index(engine)
+    # Trigger-maintained change log behind the cross-process bank version
+    create_change_log(engine)
 
     db = SessionLocal()
     try:
         from app.models.models import Question
 
         # Check if dummy data already exists
-        if db.query(Question).count() > 0:
+        has_questions = db.query(Question).count() > 0
+        # Hand the single writer connection back before the importer needs it
+        db.close()
+        if has_questions:
             print("Dummy quiz data already exists. Skipping insertion.")
-            return
-
-        # Data structure for seeding questions (Topic: [Question, OptA, OptB, OptC, OptD, CorrectKey])
-        question_data = {
-            "General Knowledge": [
-                ("What is the largest planet in our solar system?", "Jupiter", "Mars", "Earth", "Venus", "A"),
-                ("What is the process by which plants make their own food?", "Respiration", "Photosynthesis", "Digestion", "Transpiration", "B"),
-                ("Which country gifted the Statue of Liberty to the US?", "Germany", "UK", "France", "Italy", "C"),
-                ("How many continents are there?", "Five", "Six", "Four", "Seven", "D"),
-                ("What is the chemical symbol for water?", "H2O", "O2", "CO2", "NaCl", "A"),
-            ],
-            "Geography": [
-                ("What is the capital of France?", "Paris", "Rome", "Berlin", "Madrid", "A"),
-                ("Which ocean is the largest?", "Atlantic Ocean", "Pacific Ocean", "Indian Ocean", "Arctic Ocean", "B"),
-                ("Mount Everest is located in which mountain range?", "Andes", "Alps", "Himalayas", "Rockies", "C"),
-                ("The river Nile flows into which sea?", "Red Sea", "Black Sea", "Aral Sea", "Mediterranean Sea", "D"),
-                ("The Great Barrier Reef is off the coast of which country?", "Australia", "Brazil", "Mexico", "South Africa", "A"),
-            ],
-            "DSA": [
-                ("Which structure is LIFO (Last-In, First-Out)?", "Queue", "Stack", "Array", "Linked List", "B"),
-                ("What is the time complexity for accessing an element in an array by index?", "O(1)", "O(n)", "O(log n)", "O(n^2)", "A"),
-                ("A Queue is known for which order of access?", "LIFO", "FILO", "FIFO", "Random", "C"),
-                ("Which data structure uses nodes and pointers?", "Array", "Stack", "Heap", "Linked List", "D"),
-                ("An algorithm's efficiency is primarily measured by time and what else?", "Cost", "Space", "Power", "Readability", "B"),
-            ],
-            "Python": [
-                ("Which keyword is used to define a function in Python?", "func", "define", "def", "function", "C"),
-                ("What is the file extension for a Python source file?", ".py", ".p", ".pyt", ".python", "A"),
-                ("Which method adds an element to the end of a list?", "insert()", "add()", "extend()", "append()", "D"),
-                ("In Python, which loop is used to iterate over a sequence?", "while", "for", "do-while", "loop", "B"),
-                ("What is the output of '2' + '3' in Python?", "'23'", "5", "Error", "'5'", "A"),
-            ],
-            "SQL": [
-                ("Which SQL statement is used to retrieve data from a database?", "SELECT", "GET", "RETRIEVE", "EXTRACT", "A"),
-                ("Which clause is used to filter records in SQL?", "HAVING", "WHERE", "FILTER", "ORDER BY", "B"),
-                ("Which SQL statement is used to delete data?", "REMOVE", "DROP", "DELETE", "CLEAR", "C"),
-                ("Which SQL keyword is used to sort the result-set?", "SORT BY", "GROUP BY", "ARRANGE", "ORDER BY", "D"),
-                ("Which SQL function is used to count the number of rows?", "COUNT()", "SUM()", "TOTAL()", "NUMBER()", "A"),
-            ],
-        }
-
-        for topic_name, questions in question_data.items():
-            for q_text, opt_a, opt_b, opt_c, opt_d, correct_key in questions:
-                # Check for existing question to prevent duplicates on subsequent runs if DB was edited manually
-                existing_q = db.query(Question).filter(
-                    Question.topic_name == topic_name,
-                    Question.text == q_text
-                ).first()
-
-                if not existing_q:
-                    new_question = Question(
-                        topic_name=topic_name,
-                        text=q_text,
-                        option_a=opt_a,
-                        option_b=opt_b,
-                        option_c=opt_c,
-                        option_d=opt_d,
-                        correct_answer_key=correct_key
-                    )
-                    db.add(new_question)
-                    print(f"Adding question for {topic_name}: {q_text[:60]}")
-
-        db.commit()
-        print("✅ Dummy quiz data inserted successfully.")
+            return True
+
+        from app.core.importer import import_questions, iter_question_data
+        from app.core.seed_data import QUESTION_DATA
+
+        # Seed through the bulk importer; the (topic_name, text) unique index dedupes
+        stats = import_questions(iter_question_data(QUESTION_DATA))
+        print(f"✅ Dummy quiz data inserted successfully ({stats.inserted} questions).")
+        return True
 
     except Exception as e:
         db.rollback()
         print(f"An error occurred during setup: {e}")
+        return False
     finally:
         db.close()
 
 
-# Run setup when this module is imported (seeds data only if DB is empty)
-setup_database()
\ No newline at end of file
+def _schema_stamp() -> int:
+    with engine.connect() as conn:
+        return conn.exec_driver_sql("PRAGMA user_version").scalar()
+
+
+@contextmanager
+def init_lock():
+    """
+    Cross-process lock so only one worker initializes the database.
+    Uses a `<db file>.init.lock` file next to the database; in-memory
+    databases are private to the process and need no lock.
+    """
+    db_path = engine.url.database
+    if not db_path or db_path == ":memory:":
+        yield
+        return
+
+    with open(f"{db_path}.init.lock", "a+b") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def init_database() -> bool:
+    """
+    Startup entry point: make sure the schema and seed data exist.
+    Warm starts only read the version stamp. Cold starts take the init lock,
+    re-check the stamp (another worker may have finished first), run
+    setup_database() and stamp the file. Returns True if setup ran.
+    """
+    if _schema_stamp() == SCHEMA_VERSION:
+        return False
+
+    with init_lock():
+        if _schema_stamp() == SCHEMA_VERSION:
+            return False
+        if setup_database():
+            with engine.begin() as conn:
+                conn.exec_driver_sql(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        return True
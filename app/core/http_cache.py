@@ -0,0 +1,132 @@
+# app/core/http_cache.py
+
+import gzip
+import hashlib
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+
+from app.core import config
+
+try:
+    import brotli
+except ImportError:  # optional: responses fall back to gzip
+    brotli = None
+
+# --- Conditional & Compressed Responses ---
+# Bodies smaller than this are sent uncompressed
+COMPRESS_MIN_BYTES = 512
+
+# Preferred encodings, best first
+_ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def compress(body: bytes, encoding: str, cached: bool) -> bytes:
+    # Cached bodies are compressed once, so spend more CPU on them
+    if encoding == "br":
+        return brotli.compress(body, quality=11 if cached else 5)
+    return gzip.compress(body, compresslevel=9 if cached else 6, mtime=0)
+
+
+class EncodedBody:
+    """
+    A JSON body with its strong ETag and compressed variants.
+    Cached bodies (`precompress=True`) compress every encoding up front so
+    their size is known to the cache; one-off bodies compress on demand.
+    """
+
+    __slots__ = ("body", "etag", "encoded")
+
+    def __init__(self, body: bytes, precompress: bool = False):
+        self.body = body
+        # Content hash, so every worker computes the same tag for the same bank
+        self.etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+        self.encoded: Dict[str, bytes] = {}
+        if precompress and len(body) >= COMPRESS_MIN_BYTES:
+            for encoding in _ENCODINGS:
+                self.encoded[encoding] = compress(body, encoding, cached=True)
+
+    @classmethod
+    def from_parts(cls, body: bytes, etag: str, encoded: Dict[str, bytes]) -> "EncodedBody":
+        """Wrap a body whose ETag and compressed variants were computed elsewhere (e.g. a snapshot)."""
+        instance = cls.__new__(cls)
+        instance.body = body
+        instance.etag = etag
+        instance.encoded = encoded
+        return instance
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(data) for data in self.encoded.values())
+
+    def get(self, encoding: Optional[str]) -> bytes:
+        if encoding is None:
+            return self.body
+        data = self.encoded.get(encoding)
+        if data is None:
+            data = compress(self.body, encoding, cached=False)
+        return data
+
+
+def _accepted_encoding(request: Request, body: EncodedBody) -> Optional[str]:
+    if len(body.body) < COMPRESS_MIN_BYTES:
+        return None
+    accepted = {}
+    for part in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    # Prefer variants that are already compressed over compressing on demand
+    stored = [encoding for encoding in _ENCODINGS if encoding in body.encoded]
+    for encoding in stored + [encoding for encoding in _ENCODINGS if encoding not in stored]:
+        if accepted.get(encoding, accepted.get("*", 0)) > 0:
+            return encoding
+    return None
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        # Any encoding of the same content matches: "<hash>", "<hash>-gzip", ...
+        if candidate.strip('"').split("-", 1)[0] == etag:
+            return True
+    return False
+
+
+def json_response(request: Request, body: EncodedBody, cacheable: bool = True) -> Response:
+    """
+    Serve a pre-encoded JSON body with ETag / If-None-Match handling,
+    CDN-friendly Cache-Control and content negotiation for gzip/brotli.
+    Non-cacheable bodies (e.g. unseeded random quizzes) get `no-store`.
+    """
+    if not cacheable:
+        encoding = _accepted_encoding(request, body)
+        headers = {"Cache-Control": "no-store", "Vary": "Accept-Encoding"}
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return Response(content=body.get(encoding), media_type="application/json", headers=headers)
+
+    encoding = _accepted_encoding(request, body)
+    headers = {
+        # Each representation gets its own strong tag; they share the content hash
+        "ETag": f'"{body.etag}-{encoding}"' if encoding else f'"{body.etag}"',
+        "Cache-Control": config.QUIZ_CACHE_CONTROL,
+        "Vary": "Accept-Encoding",
+    }
+    if _etag_matches(request, body.etag):
+        return Response(status_code=304, headers=headers)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body.get(encoding), media_type="application/json", headers=headers)
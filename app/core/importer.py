@@ -0,0 +1,266 @@
+# app/core/importer.py
+"""
+Streaming bulk importer for the question bank.
+
+Usage:
+    python -m app.core.importer questions.jsonl more.csv [--chunk-size 5000]
+    python -m app.core.importer --seed
+
+Rows are read lazily from each source, validated, grouped into chunks and
+upserted with one executemany per chunk. Duplicates are resolved by the
+unique (topic_name, text) index: re-importing a question updates its
+options and answer key instead of adding a copy.
+
+Running servers need no restart: triggers on `questions` log every imported
+row in `bank_changes`, and workers pick the change up within
+QUIZ_BANK_VERSION_TTL seconds.
+"""
+
+import argparse
+import csv
+import json
+import logging
+import sys
+import time
+from dataclasses import dataclass
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Union
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+
+from app.core.bank import create_change_log, expire_bank_version
+from app.core.database import Base, engine
+from app.models.models import Question
+
+logger = logging.getLogger(__name__)
+
+IMPORT_CHUNK_SIZE = 5_000
+VALID_KEYS = ("A", "B", "C", "D")
+QUESTION_FIELDS = ("topic_name", "text", "option_a", "option_b", "option_c", "option_d", "correct_answer_key")
+
+
+@dataclass
+class ImportStats:
+    read: int = 0       # rows seen in the sources
+    skipped: int = 0    # rows rejected by validation
+    written: int = 0    # rows sent to the database (inserted or updated)
+    inserted: int = 0   # net new questions
+    total_questions: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.written / self.seconds if self.seconds else 0.0
+
+
+# --- Sources ---
+# Every source yields plain dicts; normalize_row() maps them to QUESTION_FIELDS.
+# Entries a source can't turn into a dict at all are yielded as InvalidRow, so
+# they are skipped and reported instead of aborting a half-finished import.
+
+class InvalidRow(NamedTuple):
+    location: str  # e.g. "bank.jsonl:42"
+    reason: str
+
+
+def iter_jsonl(path: str) -> Iterator[Union[Dict, InvalidRow]]:
+    """One JSON object per line, either flat columns or {"options": {...}, "correctAnswer": ...}."""
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            location = f"{path}:{line_number}"
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield InvalidRow(location, f"invalid JSON ({e})")
+                continue
+            if not isinstance(row, dict):
+                yield InvalidRow(location, f"expected a JSON object, got {type(row).__name__}")
+            elif not isinstance(row.get("options") or {}, dict):
+                yield InvalidRow(location, '"options" must be an object like {"A": ..., "D": ...}')
+            else:
+                yield row
+
+
+def iter_csv(path: str) -> Iterator[Dict]:
+    """CSV with a header row naming the question columns."""
+    with open(path, newline="", encoding="utf-8") as f:
+        yield from csv.DictReader(f)
+
+
+def iter_question_data(question_data: Dict[str, List[tuple]]) -> Iterator[Dict]:
+    """The {topic: [(text, a, b, c, d, key), ...]} layout used by seed_data."""
+    for topic_name, questions in question_data.items():
+        for q_text, opt_a, opt_b, opt_c, opt_d, correct_key in questions:
+            yield {
+                "topic_name": topic_name,
+                "text": q_text,
+                "option_a": opt_a,
+                "option_b": opt_b,
+                "option_c": opt_c,
+                "option_d": opt_d,
+                "correct_answer_key": correct_key,
+            }
+
+
+def iter_file(path: str) -> Iterator[Dict]:
+    if path.lower().endswith(".csv"):
+        return iter_csv(path)
+    return iter_jsonl(path)
+
+
+# --- Pipeline ---
+
+def normalize_row(row: Dict) -> Optional[Dict]:
+    """Map a source row onto the questions columns, or return None if it is invalid."""
+    if not isinstance(row, dict):
+        return None
+    options = row.get("options") or {}
+    if not isinstance(options, dict):
+        return None
+    normalized = {
+        "topic_name": row.get("topic_name") or row.get("topic"),
+        "text": row.get("text"),
+        "option_a": row.get("option_a", options.get("A")),
+        "option_b": row.get("option_b", options.get("B")),
+        "option_c": row.get("option_c", options.get("C")),
+        "option_d": row.get("option_d", options.get("D")),
+        "correct_answer_key": row.get("correct_answer_key") or row.get("correctAnswer"),
+    }
+    if any(not isinstance(normalized[field], str) or not normalized[field].strip() for field in QUESTION_FIELDS):
+        return None
+    normalized = {field: value.strip() for field, value in normalized.items()}
+    normalized["correct_answer_key"] = normalized["correct_answer_key"].upper()
+    if normalized["correct_answer_key"] not in VALID_KEYS:
+        return None
+    return normalized
+
+
+def chunked(rows: Iterable[Dict], size: int) -> Iterator[List[Dict]]:
+    iterator = iter(rows)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def ensure_unique_index(bind=engine) -> None:
+    """Create the (topic_name, text) unique index on databases created before it existed."""
+    Base.metadata.create_all(bind=bind, tables=[Question.__table__])
+    index = next(i for i in Question.__table__.indexes if i.name == "uq_questions_topic_text")
+    try:
+        index.create(bind=bind, checkfirst=True)
+    except IntegrityError as e:
+        raise RuntimeError(
+            "Existing questions contain duplicate (topic_name, text) pairs; "
+            "remove them before importing."
+        ) from e
+
+
+def _upsert_statement():
+    stmt = sqlite_insert(Question)
+    return stmt.on_conflict_do_update(
+        index_elements=[Question.topic_name, Question.text],
+        set_={
+            "option_a": stmt.excluded.option_a,
+            "option_b": stmt.excluded.option_b,
+            "option_c": stmt.excluded.option_c,
+            "option_d": stmt.excluded.option_d,
+            "correct_answer_key": stmt.excluded.correct_answer_key,
+        },
+    )
+
+
+def import_questions(
+    rows: Iterable[Dict],
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+    bind=engine,
+    progress: Optional[Callable[[ImportStats], None]] = None,
+) -> ImportStats:
+    """
+    Upsert questions from any iterable of source rows.
+    Each chunk is written in its own transaction, so memory stays bounded by
+    `chunk_size` and an interrupted import keeps the chunks already written.
+    """
+    ensure_unique_index(bind)
+    create_change_log(bind)
+    stats = ImportStats()
+    started = time.perf_counter()
+
+    def validated():
+        for row in rows:
+            stats.read += 1
+            if isinstance(row, InvalidRow):
+                stats.skipped += 1
+                if stats.skipped <= 10:
+                    logger.warning("Skipping %s: %s", row.location, row.reason)
+                continue
+            normalized = normalize_row(row)
+            if normalized is None:
+                stats.skipped += 1
+                if stats.skipped <= 10:
+                    logger.warning("Skipping invalid question row #%d: %r", stats.read, row)
+                continue
+            yield normalized
+
+    count_query = select(func.count()).select_from(Question)
+    with bind.connect() as conn:
+        before = conn.scalar(count_query)
+
+    stmt = _upsert_statement()
+    for chunk in chunked(validated(), chunk_size):
+        with bind.begin() as conn:
+            conn.execute(stmt, chunk)
+        stats.written += len(chunk)
+        if progress is not None:
+            stats.seconds = time.perf_counter() - started
+            progress(stats)
+
+    with bind.connect() as conn:
+        stats.total_questions = conn.scalar(count_query)
+    stats.inserted = stats.total_questions - before
+    stats.seconds = time.perf_counter() - started
+
+    if stats.written:
+        # Triggers already logged the rows in bank_changes, which is how running
+        # servers notice the import; this only makes the current process re-read
+        # the version now (Core writes bypass the ORM commit hook)
+        expire_bank_version()
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk import quiz questions from JSONL/CSV files.")
+    parser.add_argument("files", nargs="*", help="JSONL or CSV question files (.csv is read as CSV, anything else as JSONL)")
+    parser.add_argument("--seed", action="store_true", help="also import the built-in seed questions")
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    if not args.files and not args.seed:
+        parser.error("nothing to import: pass files and/or --seed")
+
+    def sources():
+        if args.seed:
+            from app.core.seed_data import QUESTION_DATA
+            yield from iter_question_data(QUESTION_DATA)
+        for path in args.files:
+            yield from iter_file(path)
+
+    def report(stats: ImportStats):
+        print(f"  {stats.written:,} rows written ({stats.rows_per_sec:,.0f} rows/sec)", file=sys.stderr)
+
+    stats = import_questions(sources(), chunk_size=args.chunk_size, progress=report)
+    print(
+        f"✅ Imported {stats.written:,} rows in {stats.seconds:.2f}s ({stats.rows_per_sec:,.0f} rows/sec): "
+        f"{stats.inserted:,} new, {stats.written - stats.inserted:,} updated, {stats.skipped:,} skipped. "
+        f"Bank now has {stats.total_questions:,} questions."
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+# app/core/metrics.py
+
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+from starlette.routing import Match
+
+from app.core import config
+
+logger = logging.getLogger(__name__)
+
+# --- Metrics Registry ---
+# Minimal Prometheus-compatible counters, gauges and histograms; rendered in
+# the text exposition format by the /metrics endpoint.
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+# Statements kept per request for the slow-request log
+SLOW_LOG_MAX_STATEMENTS = 50
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def _samples(self):
+        return [f"{self.name}{_format_labels(self.labels, k)} {v}" for k, v in sorted(self._values.items())]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, *labels: str, value: float) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+        self._values: Dict[LabelValues, list] = {}  # labels -> [bucket counts..., sum, count]
+
+    def observe(self, *labels: str, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = self._values[labels] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def _samples(self):
+        lines = []
+        for labels, series in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = _format_labels(self.labels, labels, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            le = _format_labels(self.labels, labels, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{le} {series[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, labels)} {series[-2]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, labels)} {series[-1]}")
+        return lines
+
+
+REGISTRY: List[_Metric] = []
+
+
+def render_metrics() -> str:
+    return "\n".join(line for metric in REGISTRY for line in metric.render()) + "\n"
+
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "quiz_http_request_duration_seconds", "HTTP request latency by route.", ("method", "route", "status"))
+HTTP_IN_FLIGHT = Gauge("quiz_http_requests_in_flight", "Requests currently being served.", ("method", "route"))
+REQUEST_DB_QUERIES = Histogram(
+    "quiz_http_request_db_queries", "SQL statements issued per request.", ("route",), buckets=COUNT_BUCKETS)
+REQUEST_DB_SECONDS = Histogram(
+    "quiz_http_request_db_seconds", "Time spent executing SQL per request.", ("route",))
+DB_QUERY_SECONDS = Histogram("quiz_db_query_duration_seconds", "SQL statement execution time.", ("engine",))
+DB_POOL_WAIT_SECONDS = Histogram(
+    "quiz_db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection.", ("engine",))
+STARTUP_SECONDS = Gauge("quiz_startup_seconds", "Duration of each worker startup phase.", ("phase",))
+ATTEMPT_FLUSH_RETRIES = Counter("quiz_attempt_flush_retries_total", "Attempt batch commits retried after an error.")
+ATTEMPTS_DROPPED = Counter(
+    "quiz_attempts_dropped_total", "Graded attempts that could not be persisted after all retries.")
+
+
+# --- Per-Request Tracking ---
+
+class RequestStats:
+    __slots__ = ("queries", "db_seconds", "statements")
+
+    def __init__(self, capture_statements: bool):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.statements: Optional[List[Tuple[float, str]]] = [] if capture_statements else None
+
+
+_current_request: ContextVar[Optional[RequestStats]] = ContextVar("quiz_request_stats", default=None)
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    metrics_name = "default"  # set per engine after create_engine()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_WAIT_SECONDS.observe(self.metrics_name, value=time.perf_counter() - started)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics_name = self.metrics_name
+        return pool
+
+
+def instrument_engine(engine, name: str) -> None:
+    """Time every statement on `engine` and attribute it to the current request."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("quiz_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["quiz_query_start"].pop()
+        DB_QUERY_SECONDS.observe(name, value=elapsed)
+        stats = _current_request.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_seconds += elapsed
+            if stats.statements is not None and len(stats.statements) < SLOW_LOG_MAX_STATEMENTS:
+                stats.statements.append((elapsed, statement))
+
+
+def _route_path(scope) -> str:
+    """The matched route template (e.g. /quizzes/start/{topic_name}), to keep label cardinality low."""
+    app = scope.get("app")
+    if app is not None:
+        for route in app.router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return route.path
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording per-route latency, in-flight requests and the
+    SQL issued by each request. Requests slower than QUIZ_SLOW_REQUEST_MS
+    (if set) are logged together with their statements.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.slow_seconds = config.QUIZ_SLOW_REQUEST_MS / 1000 if config.QUIZ_SLOW_REQUEST_MS > 0 else None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method, route = scope["method"], _route_path(scope)
+        stats = RequestStats(capture_statements=self.slow_seconds is not None)
+        token = _current_request.set(stats)
+        status = "500"
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc(method, route)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            HTTP_IN_FLIGHT.inc(method, route, amount=-1)
+            _current_request.reset(token)
+            HTTP_REQUEST_SECONDS.observe(method, route, status, value=elapsed)
+            REQUEST_DB_QUERIES.observe(route, value=stats.queries)
+            REQUEST_DB_SECONDS.observe(route, value=stats.db_seconds)
+            if self.slow_seconds is not None and elapsed >= self.slow_seconds:
+                logger.warning(
+                    "Slow request %s %s (%s): %.1f ms, %d queries in %.1f ms%s",
+                    method, scope["path"], status, elapsed * 1000, stats.queries, stats.db_seconds * 1000,
+                    "".join(f"\n  [{t * 1000:.2f} ms] {sql}" for t, sql in stats.statements),
+                )
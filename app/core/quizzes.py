@@ -0,0 +1,63 @@
+# app/core/quizzes.py
+
+import json
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.models import Question
+
+# --- Quiz Payload Helpers ---
+# Questions are read as plain column tuples and encoded straight to JSON
+# bytes, matching the QuizResponse / QuizForResultResponse shapes.
+QUESTION_COLUMNS = (
+    Question.id, Question.text,
+    Question.option_a, Question.option_b, Question.option_c, Question.option_d,
+    Question.correct_answer_key,
+)
+
+
+def dumps(obj) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def question_dicts(topic: str, rows: Sequence[Tuple], with_answers: bool) -> List[Dict]:
+    questions = []
+    for q_id, text, opt_a, opt_b, opt_c, opt_d, correct_key in rows:
+        question = {
+            "id": q_id,
+            "topic_name": topic,
+            "text": text,
+            "options": {"A": opt_a, "B": opt_b, "C": opt_c, "D": opt_d},
+        }
+        if with_answers:
+            question["correctAnswer"] = correct_key
+        questions.append(question)
+    return questions
+
+
+def fetch_questions_by_ids(db: Session, topic: str, question_ids: Sequence[int], with_answers: bool) -> List[Dict]:
+    """
+    Encode the given questions of `topic`, in the order of `question_ids`.
+    Ids that don't belong to the topic are left out. Used for sampled quizzes,
+    so the query only touches the sampled rows.
+    """
+    rows = db.execute(
+        select(*QUESTION_COLUMNS).where(Question.topic_name == topic, Question.id.in_(question_ids))
+    ).all()
+    by_id = {row[0]: row for row in rows}
+    ordered = [by_id[q_id] for q_id in dict.fromkeys(question_ids) if q_id in by_id]
+    return question_dicts(topic, ordered, with_answers)
+
+
+def fetch_topic_page(
+    db: Session, topic: str, after_id: Optional[int], limit: int, with_answers: bool
+) -> Tuple[List[Dict], Optional[int]]:
+    """One page of a topic in id order; returns (questions, next_after_id)."""
+    query = select(*QUESTION_COLUMNS).where(Question.topic_name == topic).order_by(Question.id).limit(limit)
+    if after_id is not None:
+        query = query.where(Question.id > after_id)
+    rows = db.execute(query).all()
+    next_after_id = rows[-1][0] if len(rows) == limit else None
+    return question_dicts(topic, rows, with_answers), next_after_id
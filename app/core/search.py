@@ -0,0 +1,195 @@
+# app/core/search.py
+"""
+Full-text question search backed by an SQLite FTS5 index.
+
+Usage:
+    python -m app.core.search rebuild
+
+`questions_fts` is an external-content FTS5 table over `questions`: it
+stores only the inverted index and is kept in sync by triggers, so every
+write path (ORM, bulk importer, manual SQL) updates it automatically.
+`rebuild` regenerates it from scratch, e.g. after restoring a database
+copied from a build without the triggers.
+"""
+
+import argparse
+import base64
+import json
+import re
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.database import engine
+
+# --- Search Index ---
+# bm25() column weights, in questions_fts column order: a hit in the question
+# text counts ten times as much as a hit in one of the options.
+BM25_WEIGHTS = "10.0, 1.0, 1.0, 1.0, 1.0, 0.0"
+
+SEARCH_DDL = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS questions_fts USING fts5(
+        text, option_a, option_b, option_c, option_d, topic_name UNINDEXED,
+        content='questions', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS questions_fts_ai AFTER INSERT ON questions BEGIN
+        INSERT INTO questions_fts(rowid, text, option_a, option_b, option_c, option_d, topic_name)
+        VALUES (new.id, new.text, new.option_a, new.option_b, new.option_c, new.option_d, new.topic_name);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS questions_fts_ad AFTER DELETE ON questions BEGIN
+        INSERT INTO questions_fts(questions_fts, rowid, text, option_a, option_b, option_c, option_d, topic_name)
+        VALUES ('delete', old.id, old.text, old.option_a, old.option_b, old.option_c, old.option_d, old.topic_name);
+    END
+    """,
+    # Only re-index when an indexed column changed, so no-op upserts from a
+    # re-import don't rewrite the index
+    """
+    CREATE TRIGGER IF NOT EXISTS questions_fts_au AFTER UPDATE ON questions
+    WHEN old.id IS NOT new.id OR old.topic_name IS NOT new.topic_name OR old.text IS NOT new.text
+      OR old.option_a IS NOT new.option_a OR old.option_b IS NOT new.option_b
+      OR old.option_c IS NOT new.option_c OR old.option_d IS NOT new.option_d
+    BEGIN
+        INSERT INTO questions_fts(questions_fts, rowid, text, option_a, option_b, option_c, option_d, topic_name)
+        VALUES ('delete', old.id, old.text, old.option_a, old.option_b, old.option_c, old.option_d, old.topic_name);
+        INSERT INTO questions_fts(rowid, text, option_a, option_b, option_c, option_d, topic_name)
+        VALUES (new.id, new.text, new.option_a, new.option_b, new.option_c, new.option_d, new.topic_name);
+    END
+    """,
+)
+
+# Triggers redefined after their first release (questions_fts_au gained its WHEN guard)
+SEARCH_REPLACED_TRIGGERS = ("questions_fts_au",)
+
+# Rank and page on the FTS table alone, then join only the page's rows
+SEARCH_SQL = f"""
+    SELECT q.id, q.topic_name, q.text, q.option_a, q.option_b, q.option_c, q.option_d, page.score
+    FROM (
+        SELECT id, score FROM (
+            SELECT rowid AS id, bm25(questions_fts, {BM25_WEIGHTS}) AS score
+            FROM questions_fts
+            WHERE questions_fts MATCH :match
+              AND (:topic IS NULL OR rowid IN (SELECT id FROM questions WHERE topic_name = :topic))
+        )
+        WHERE :after_score IS NULL OR score > :after_score OR (score = :after_score AND id > :after_id)
+        ORDER BY score, id
+        LIMIT :limit
+    ) AS page
+    JOIN questions AS q ON q.id = page.id
+    ORDER BY page.score, q.id
+"""
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def create_search_index(bind=engine) -> None:
+    """Create the FTS table and triggers if missing, indexing existing questions once."""
+    if bind.dialect.name != "sqlite":
+        return
+    with bind.begin() as conn:
+        exists = conn.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'questions_fts'"
+        ).first()
+        # Triggers are created IF NOT EXISTS; drop the ones whose definition
+        # changed since earlier schema versions so they get the current one
+        for trigger in SEARCH_REPLACED_TRIGGERS:
+            conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {trigger}")
+        for statement in SEARCH_DDL:
+            conn.exec_driver_sql(statement)
+        if not exists:
+            conn.exec_driver_sql("INSERT INTO questions_fts(questions_fts) VALUES ('rebuild')")
+
+
+def rebuild_search_index(bind=engine) -> float:
+    """Regenerate the whole index from `questions`; returns the elapsed seconds."""
+    started = time.perf_counter()
+    create_search_index(bind)
+    with bind.begin() as conn:
+        conn.exec_driver_sql("INSERT INTO questions_fts(questions_fts) VALUES ('rebuild')")
+        conn.exec_driver_sql("INSERT INTO questions_fts(questions_fts) VALUES ('optimize')")
+    return time.perf_counter() - started
+
+
+def build_match_expression(query: str) -> Optional[str]:
+    """
+    Turn free text into a safe FTS5 query: every word must match (implicit AND),
+    and the last word also matches as a prefix so results update while typing.
+    FTS5 operators typed by the user are treated as plain words.
+    """
+    tokens = _TOKEN.findall(query)
+    if not tokens:
+        return None
+    terms = [f'"{token}"' for token in tokens]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def encode_cursor(score: float, q_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([score, q_id]).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    """Raises ValueError for cursors this module didn't produce."""
+    try:
+        score, q_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return float(score), int(q_id)
+    except Exception as e:
+        raise ValueError("Invalid search cursor") from e
+
+
+def search_questions(
+    db: Session, query: str, topic: Optional[str], cursor: Optional[str], limit: int
+) -> Tuple[List[Dict], Optional[str]]:
+    """
+    BM25-ranked questions matching `query`, optionally within one topic.
+    Pages are keyset-paginated on (score, id); returns (results, next_cursor).
+    """
+    match = build_match_expression(query)
+    if match is None:
+        return [], None
+    after_score, after_id = decode_cursor(cursor) if cursor else (None, None)
+
+    rows = db.execute(text(SEARCH_SQL), {
+        "match": match,
+        "topic": topic,
+        "after_score": after_score,
+        "after_id": after_id,
+        "limit": limit,
+    }).all()
+
+    results = [
+        {
+            "id": q_id,
+            "topic_name": topic_name,
+            "text": q_text,
+            "options": {"A": opt_a, "B": opt_b, "C": opt_c, "D": opt_d},
+            # bm25() is lower-is-better; expose a higher-is-better relevance score
+            "score": -score,
+        }
+        for q_id, topic_name, q_text, opt_a, opt_b, opt_c, opt_d, score in rows
+    ]
+    next_cursor = encode_cursor(rows[-1][-1], rows[-1][0]) if len(rows) == limit else None
+    return results, next_cursor
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Manage the full-text question search index.")
+    parser.add_argument("command", choices=("rebuild",))
+    args = parser.parse_args(argv)
+
+    if args.command == "rebuild":
+        seconds = rebuild_search_index()
+        print(f"✅ Rebuilt question search index in {seconds:.2f}s.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,40 @@
+# app/core/seed_data.py
+
+# Data structure for seeding questions (Topic: [Question, OptA, OptB, OptC, OptD, CorrectKey])
+QUESTION_DATA = {
+    "General Knowledge": [
+        ("What is the largest planet in our solar system?", "Jupiter", "Mars", "Earth", "Venus", "A"),
+        ("What is the process by which plants make their own food?", "Respiration", "Photosynthesis", "Digestion", "Transpiration", "B"),
+        ("Which country gifted the Statue of Liberty to the US?", "Germany", "UK", "France", "Italy", "C"),
+        ("How many continents are there?", "Five", "Six", "Four", "Seven", "D"),
+        ("What is the chemical symbol for water?", "H2O", "O2", "CO2", "NaCl", "A"),
+    ],
+    "Geography": [
+        ("What is the capital of France?", "Paris", "Rome", "Berlin", "Madrid", "A"),
+        ("Which ocean is the largest?", "Atlantic Ocean", "Pacific Ocean", "Indian Ocean", "Arctic Ocean", "B"),
+        ("Mount Everest is located in which mountain range?", "Andes", "Alps", "Himalayas", "Rockies", "C"),
+        ("The river Nile flows into which sea?", "Red Sea", "Black Sea", "Aral Sea", "Mediterranean Sea", "D"),
+        ("The Great Barrier Reef is off the coast of which country?", "Australia", "Brazil", "Mexico", "South Africa", "A"),
+    ],
+    "DSA": [
+        ("Which structure is LIFO (Last-In, First-Out)?", "Queue", "Stack", "Array", "Linked List", "B"),
+        ("What is the time complexity for accessing an element in an array by index?", "O(1)", "O(n)", "O(log n)", "O(n^2)", "A"),
+        ("A Queue is known for which order of access?", "LIFO", "FILO", "FIFO", "Random", "C"),
+        ("Which data structure uses nodes and pointers?", "Array", "Stack", "Heap", "Linked List", "D"),
+        ("An algorithm's efficiency is primarily measured by time and what else?", "Cost", "Space", "Power", "Readability", "B"),
+    ],
+    "Python": [
+        ("Which keyword is used to define a function in Python?", "func", "define", "def", "function", "C"),
+        ("What is the file extension for a Python source file?", ".py", ".p", ".pyt", ".python", "A"),
+        ("Which method adds an element to the end of a list?", "insert()", "add()", "extend()", "append()", "D"),
+        ("In Python, which loop is used to iterate over a sequence?", "while", "for", "do-while", "loop", "B"),
+        ("What is the output of '2' + '3' in Python?", "'23'", "5", "Error", "'5'", "A"),
+    ],
+    "SQL": [
+        ("Which SQL statement is used to retrieve data from a database?", "SELECT", "GET", "RETRIEVE", "EXTRACT", "A"),
+        ("Which clause is used to filter records in SQL?", "HAVING", "WHERE", "FILTER", "ORDER BY", "B"),
+        ("Which SQL statement is used to delete data?", "REMOVE", "DROP", "DELETE", "CLEAR", "C"),
+        ("Which SQL keyword is used to sort the result-set?", "SORT BY", "GROUP BY", "ARRANGE", "ORDER BY", "D"),
+        ("Which SQL function is used to count the number of rows?", "COUNT()", "SUM()", "TOTAL()", "NUMBER()", "A"),
+    ],
+}
@@ -0,0 +1,411 @@
+# app/core/snapshot.py
+"""
+Compiled, read-only snapshot of the question bank shared by all workers.
+
+Usage:
+    python -m app.core.snapshot build [--path bank.snap]
+
+The snapshot is one flat binary file that every worker memory-maps, so with
+`uvicorn --workers N` the bank lives once in the page cache instead of once
+per process, and reads never touch SQLite. Publishing is an atomic
+`os.replace()` of the file; workers notice the new inode within
+QUIZ_SNAPSHOT_CHECK_INTERVAL seconds and switch over without restarting.
+
+Layout (native byte order, sections 8-byte aligned):
+    header        magic, counts, file size and absolute section offsets
+    keys          u8[max_id + 1]   ord(correct key) by question id, 0 = no question
+    topic_of      u32[max_id + 1]  topic index by question id
+    position_of   u32[max_id + 1]  record index by question id
+    topic_ids     u32[questions]   question ids sorted by (topic, id)
+    topics        TOPIC_RECORD per topic, sorted by name
+    records       QUESTION_RECORD per question, same order as topic_ids
+    heap          UTF-8 strings and each topic's pre-encoded (and gzipped)
+                  QuizResponse / QuizForResultResponse bodies; all offsets
+                  stored in topic and question records are heap-relative
+"""
+
+import argparse
+import gzip
+import hashlib
+import logging
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import threading
+import time
+from array import array
+from bisect import bisect_right
+from itertools import groupby
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+
+from app.core import config
+from app.core.answer_keys import AnswerKeys
+from app.core.http_cache import COMPRESS_MIN_BYTES, EncodedBody
+from app.core.quizzes import QUESTION_COLUMNS, dumps, question_dicts
+from app.models.models import Question
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"QZSNAP01"
+FORMAT_VERSION = 3
+
+# magic, format, byte order (1 = little), topics, questions, max_id, file size,
+# keys/topic_of/position_of/topic_ids/topics/records/heap offsets,
+# topics body json offset + length and gzip offset + length, topics body etag
+HEADER = struct.Struct("<8sIIIIIQQQQQQQQQQQQ32s")
+# name offset + length, first index into topic_ids, question count, then
+# offset + length of questions json, questions gzip, answers json, answers gzip,
+# then the questions and answers etags
+TOPIC_RECORD = struct.Struct("<QIII8Q32s32s")
+# id, topic index, correct key, offset of the five consecutive strings
+# (text, A, B, C, D) and their lengths
+QUESTION_RECORD = struct.Struct("<IIc3xQIIIII")
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def _check_range(path: str, what: str, offset: int, length: int, size: int) -> None:
+    """Reject a section or string that does not lie inside its `size`-byte container."""
+    if offset < 0 or length < 0 or offset + length > size:
+        raise ValueError(f"{path} is corrupt: {what} ({offset}+{length}) is outside 0..{size}")
+
+
+class Snapshot:
+    """A memory-mapped snapshot. All lookups slice the shared mapping; nothing is copied up front."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mm)
+        if len(self._mm) < HEADER.size:
+            raise ValueError(f"{path} is too small to be a question bank snapshot")
+        (magic, version, byte_order, topic_count, question_count, max_id, file_size,
+         keys_off, topic_of_off, position_off, topic_ids_off, topics_off, records_off, heap_off,
+         topics_json_off, topics_json_len, topics_gz_off, topics_gz_len, topics_etag) = HEADER.unpack_from(view, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} question bank snapshot")
+        if byte_order != (1 if sys.byteorder == "little" else 0):
+            raise ValueError(f"{path} was built on a machine with a different byte order")
+        # A truncated or overwritten file must fail here, not as a short
+        # slice or a failed cast in the middle of a request
+        if file_size != len(self._mm):
+            raise ValueError(f"{path} is corrupt: header says {file_size} bytes, file has {len(self._mm)}")
+        slots = max_id + 1
+        for what, offset, length in (
+            ("keys", keys_off, slots),
+            ("topic_of", topic_of_off, 4 * slots),
+            ("position_of", position_off, 4 * slots),
+            ("topic_ids", topic_ids_off, 4 * question_count),
+            ("topics", topics_off, topic_count * TOPIC_RECORD.size),
+            ("records", records_off, question_count * QUESTION_RECORD.size),
+            ("heap", heap_off, 0),
+        ):
+            _check_range(path, what, offset, length, file_size)
+
+        self.path = path
+        self._view = view
+        self._heap = view[heap_off:]
+        self._records_off = records_off
+        self.question_count = question_count
+
+        # Same shapes as AnswerKeyIndex's arrays, so grading can use them directly
+        self.keys = view[keys_off:keys_off + max_id + 1]
+        self.topic_of = view[topic_of_off:topic_of_off + 4 * (max_id + 1)].cast("I")
+        self._position_of = view[position_off:position_off + 4 * (max_id + 1)].cast("I")
+        topic_ids = view[topic_ids_off:topic_ids_off + 4 * question_count].cast("I")
+
+        # Only the (small) topic table is decoded eagerly
+        self.topics: List[str] = []
+        self.topic_ids: Dict[str, int] = {}
+        self.topic_questions: List[memoryview] = []
+        self._topic_records: List[tuple] = []
+        heap_size = len(self._heap)
+        for index in range(topic_count):
+            record = TOPIC_RECORD.unpack_from(view, topics_off + index * TOPIC_RECORD.size)
+            name_off, name_len, first, count = record[:4]
+            _check_range(path, f"topic {index} name", name_off, name_len, heap_size)
+            _check_range(path, f"topic {index} question ids", first, count, question_count)
+            for body in range(4, 12, 2):
+                _check_range(path, f"topic {index} body", record[body], record[body + 1], heap_size)
+            name = str(self._heap[name_off:name_off + name_len], "utf-8")
+            self.topics.append(name)
+            self.topic_ids[name] = index
+            self.topic_questions.append(topic_ids[first:first + count])
+            self._topic_records.append(record)
+
+        # The AnswerKeys view of this snapshot, built once so every request shares it
+        self.answer_keys = AnswerKeys(
+            None, self.keys, self.topic_of, self.topics, self.topic_ids, self.topic_questions
+        )
+
+        _check_range(path, "topics body", topics_json_off, topics_json_len, heap_size)
+        _check_range(path, "topics gzip body", topics_gz_off, topics_gz_len, heap_size)
+        self.topics_body = self._body(topics_json_off, topics_json_len, topics_gz_off, topics_gz_len, topics_etag)
+
+    # -- quiz bodies -------------------------------------------------------
+
+    def _body(self, json_off, json_len, gz_off, gz_len, etag: bytes) -> EncodedBody:
+        encoded = {"gzip": self._heap[gz_off:gz_off + gz_len]} if gz_len else {}
+        return EncodedBody.from_parts(self._heap[json_off:json_off + json_len], etag.decode("ascii"), encoded)
+
+    def topic_bodies(self, topic: str) -> Optional[Tuple[EncodedBody, EncodedBody]]:
+        """(questions body, answers body) for a whole topic, served straight from the mapping."""
+        topic_id = self.topic_ids.get(topic)
+        if topic_id is None:
+            return None
+        record = self._topic_records[topic_id]
+        return self._body(*record[4:8], record[12]), self._body(*record[8:12], record[13])
+
+    # -- question rows -----------------------------------------------------
+
+    def row(self, q_id: int) -> Optional[Tuple]:
+        """A QUESTION_COLUMNS-shaped tuple for one question, or None."""
+        if not 0 < q_id < len(self.keys) or not self.keys[q_id]:
+            return None
+        position = self._position_of[q_id]
+        if position >= self.question_count:
+            raise ValueError(f"{self.path} is corrupt: question {q_id} points past the last record")
+        offset = self._records_off + position * QUESTION_RECORD.size
+        _, _, key, str_off, *lengths = QUESTION_RECORD.unpack_from(self._view, offset)
+        _check_range(self.path, f"question {q_id} strings", str_off, sum(lengths), len(self._heap))
+        strings = []
+        for length in lengths:
+            strings.append(str(self._heap[str_off:str_off + length], "utf-8"))
+            str_off += length
+        return (q_id, *strings, key.decode("ascii"))
+
+    def rows_by_ids(self, topic: str, question_ids: Sequence[int]) -> List[Tuple]:
+        """Rows for the ids that belong to `topic`, in the given order, without repeats."""
+        topic_id = self.topic_ids.get(topic)
+        if topic_id is None:
+            return []
+        rows = []
+        for q_id in dict.fromkeys(question_ids):
+            if 0 < q_id < len(self.keys) and self.keys[q_id] and self.topic_of[q_id] == topic_id:
+                rows.append(self.row(q_id))
+        return rows
+
+    def topic_page(self, topic: str, after_id: Optional[int], limit: int) -> Tuple[List[Tuple], Optional[int]]:
+        """Keyset page of a topic in id order; returns (rows, next_after_id)."""
+        topic_id = self.topic_ids.get(topic)
+        if topic_id is None:
+            return [], None
+        question_ids = self.topic_questions[topic_id]
+        start = bisect_right(question_ids, after_id) if after_id is not None else 0
+        rows = [self.row(q_id) for q_id in question_ids[start:start + limit]]
+        next_after_id = rows[-1][0] if len(rows) == limit else None
+        return rows, next_after_id
+
+
+class SnapshotStore:
+    """
+    Hands out the current Snapshot for QUIZ_SNAPSHOT_PATH, re-mapping the file
+    when a new one has been published. Old mappings stay valid for requests
+    still using them and are released once unreferenced.
+    """
+
+    def __init__(self, path: str, check_interval: float):
+        self.path = path
+        self.check_interval = check_interval
+        self._snapshot: Optional[Snapshot] = None
+        self._file_key = None
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def current(self) -> Optional[Snapshot]:
+        if not self.path:
+            return None
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return self._snapshot
+        with self._lock:
+            if now - self._checked_at < self.check_interval:
+                return self._snapshot
+            self._checked_at = now
+            try:
+                st = os.stat(self.path)
+            except FileNotFoundError:
+                return self._snapshot
+            file_key = (st.st_ino, st.st_mtime_ns, st.st_size)
+            if file_key != self._file_key:
+                try:
+                    self._snapshot = Snapshot(self.path)
+                    logger.info("Mapped question bank snapshot %s (%d questions)", self.path, self._snapshot.question_count)
+                except (OSError, ValueError, TypeError, struct.error):
+                    logger.exception("Could not map question bank snapshot %s; keeping the previous one", self.path)
+                self._file_key = file_key
+            return self._snapshot
+
+
+snapshot_store = SnapshotStore(config.QUIZ_SNAPSHOT_PATH, config.QUIZ_SNAPSHOT_CHECK_INTERVAL)
+
+
+# --- Building ---
+
+def _etag(body: bytes) -> bytes:
+    # Same content hash EncodedBody uses, so ETags don't change when a worker switches to the snapshot
+    return hashlib.blake2b(body, digest_size=16).hexdigest().encode("ascii")
+
+
+class _Heap:
+    """Append-only spill file for strings and bodies, copied to the end of the snapshot."""
+
+    def __init__(self):
+        self.size = 0
+        self.file = tempfile.TemporaryFile()
+
+    def add(self, data: bytes) -> Tuple[int, int]:
+        offset = self.size
+        self.file.write(data)
+        self.size += len(data)
+        return offset, len(data)
+
+
+def _encode_body(heap: _Heap, body: bytes) -> Tuple[int, int, int, int]:
+    json_off, json_len = heap.add(body)
+    gz_off, gz_len = heap.add(gzip.compress(body, compresslevel=9, mtime=0)) if len(body) >= COMPRESS_MIN_BYTES else (0, 0)
+    return json_off, json_len, gz_off, gz_len
+
+
+def build_snapshot(path: str, bind=None) -> Dict:
+    """
+    Compile the questions table into a snapshot at `path`. The bank is read
+    with a single ordered query (one consistent view), and the file is
+    written next to its destination and atomically swapped in, so running
+    workers either see the old snapshot or the complete new one.
+    """
+    from app.core.database import read_engine
+
+    bind = bind or read_engine
+    started = time.perf_counter()
+
+    keys = bytearray(1)  # id 0 is never a question
+    topic_of = array("I", [0])
+    position_of = array("I", [0])
+    topic_ids = array("I")
+    topic_names: List[str] = []
+    topic_records = bytearray()
+    records = bytearray()
+    heap = _Heap()
+
+    with bind.connect() as conn:
+        rows = conn.execution_options(yield_per=10_000).execute(
+            select(Question.topic_name, *QUESTION_COLUMNS).order_by(Question.topic_name, Question.id)
+        )
+        # One topic in memory at a time, for its pre-encoded bodies
+        for topic, group in groupby(rows, key=lambda row: row[0]):
+            topic_index = len(topic_names)
+            topic_names.append(topic)
+            topic_rows = [tuple(row)[1:] for row in group]
+            first = len(topic_ids)
+            for q_id, text, opt_a, opt_b, opt_c, opt_d, correct_key in topic_rows:
+                encoded = [value.encode("utf-8") for value in (text, opt_a, opt_b, opt_c, opt_d)]
+                str_off, _ = heap.add(b"".join(encoded))
+                missing = q_id + 1 - len(keys)
+                if missing > 0:
+                    keys.extend(bytes(missing))
+                    topic_of.extend(array("I", [0]) * missing)
+                    position_of.extend(array("I", [0]) * missing)
+                keys[q_id] = ord(correct_key)
+                topic_of[q_id] = topic_index
+                position_of[q_id] = len(topic_ids)
+                topic_ids.append(q_id)
+                records += QUESTION_RECORD.pack(
+                    q_id, topic_index, correct_key.encode("ascii"), str_off, *(len(value) for value in encoded)
+                )
+
+            name_off, name_len = heap.add(topic.encode("utf-8"))
+            questions_body = dumps({"topic_name": topic, "questions": question_dicts(topic, topic_rows, with_answers=False)})
+            answers_body = dumps({"topic_name": topic, "questions": question_dicts(topic, topic_rows, with_answers=True)})
+            topic_records += TOPIC_RECORD.pack(
+                name_off, name_len, first, len(topic_rows),
+                *_encode_body(heap, questions_body), *_encode_body(heap, answers_body),
+                _etag(questions_body), _etag(answers_body),
+            )
+
+    topics_body = dumps({"topics": topic_names})
+    topics_body_parts = _encode_body(heap, topics_body)
+
+    slots = len(keys)
+    keys_off = _align(HEADER.size)
+    topic_of_off = _align(keys_off + slots)
+    position_off = _align(topic_of_off + 4 * slots)
+    topic_ids_off = _align(position_off + 4 * slots)
+    topics_off = _align(topic_ids_off + 4 * len(topic_ids))
+    records_off = _align(topics_off + len(topic_records))
+    heap_off = _align(records_off + len(records))
+    header = HEADER.pack(
+        MAGIC, FORMAT_VERSION, 1 if sys.byteorder == "little" else 0, len(topic_names), len(topic_ids), slots - 1,
+        heap_off + heap.size,
+        keys_off, topic_of_off, position_off, topic_ids_off, topics_off, records_off, heap_off,
+        *topics_body_parts, _etag(topics_body),
+    )
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".snapshot-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            for offset, data in (
+                (0, header), (keys_off, keys), (topic_of_off, topic_of.tobytes()),
+                (position_off, position_of.tobytes()), (topic_ids_off, topic_ids.tobytes()),
+                (topics_off, topic_records), (records_off, records), (heap_off, b""),
+            ):
+                out.write(bytes(offset - out.tell()))
+                out.write(data)
+            heap.file.seek(0)
+            shutil.copyfileobj(heap.file, out)
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    finally:
+        heap.file.close()
+
+    return {
+        "path": path,
+        "topics": len(topic_names),
+        "questions": len(topic_ids),
+        "bytes": os.path.getsize(path),
+        "seconds": time.perf_counter() - started,
+    }
+
+
+def ensure_snapshot() -> None:
+    """Build the configured snapshot on first start if nobody has published one yet."""
+    if not config.QUIZ_SNAPSHOT_PATH or os.path.exists(config.QUIZ_SNAPSHOT_PATH):
+        return
+    from app.core.database import init_lock
+
+    with init_lock():
+        if not os.path.exists(config.QUIZ_SNAPSHOT_PATH):
+            build_snapshot(config.QUIZ_SNAPSHOT_PATH)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Build the shared question bank snapshot.")
+    parser.add_argument("command", choices=("build",))
+    parser.add_argument("--path", default=config.QUIZ_SNAPSHOT_PATH, help="defaults to QUIZ_SNAPSHOT_PATH")
+    args = parser.parse_args(argv)
+    if not args.path:
+        parser.error("no snapshot path: pass --path or set QUIZ_SNAPSHOT_PATH")
+
+    stats = build_snapshot(args.path)
+    print(
+        f"✅ Published snapshot {stats['path']}: {stats['questions']:,} questions in {stats['topics']:,} topics, "
+        f"{stats['bytes']:,} bytes, built in {stats['seconds']:.2f}s."
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
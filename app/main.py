@@ -1,11 +1,27 @@
-from typing import List, Dict
-from fastapi import FastAPI, Depends, HTTPException
+import logging
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import List, Dict, Optional, Tuple, Union
+from fastapi import FastAPI, Depends, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.core.database import setup_database, get_db
-from app.models.models import Question
+from app.core.config import QUIZ_STARTUP_BUDGET_MS
+from app.core.database import init_database, get_read_db
+from app.core.cache import get_topic_payload, get_topics_body
+from app.core.http_cache import EncodedBody, json_response
+from app.core.search import search_questions
+from app.core.metrics import STARTUP_SECONDS, MetricsMiddleware, render_metrics
+from app.core.quizzes import dumps, fetch_questions_by_ids, fetch_topic_page, question_dicts
+from app.core.snapshot import ensure_snapshot, snapshot_store
+from app.core.answer_keys import AnswerKeys, answer_key_index
+from app.core.batch import RequestStreamingResponse, stream_batch_results
+from app.core.attempts import AttemptQueueFull, attempt_writer
+from app.models.models import Attempt, Question
 
 
 from pydantic import BaseModel
@@ -21,6 +37,8 @@ class QuestionWithAnswerResponse(BaseModel):
 class QuizForResultResponse(BaseModel):
     topic_name: str
     questions: List[QuestionWithAnswerResponse]
+    seed: Optional[int] = None  # set for sampled quizzes
+    next_after_id: Optional[int] = None  # set for paginated browsing
 
 class QuestionResponse(BaseModel):
     id: int
@@ -35,10 +53,25 @@ class SubmissionItem(BaseModel):
 class SubmissionRequest(BaseModel):
     topic_name: str
     answers: List[SubmissionItem]
+    user_id: Optional[str] = None
 
 class QuizResponse(BaseModel):
     topic_name: str
     questions: List[QuestionResponse]
+    seed: Optional[int] = None  # pass back to /quizzes/results to review the same questions
+    next_after_id: Optional[int] = None  # pass as `after_id` to fetch the next page
+
+class QuestionSearchResult(BaseModel):
+    id: int
+    topic_name: str
+    text: str
+    options: Dict[str, str]
+    score: float  # BM25 relevance, higher is better
+
+class QuestionSearchResponse(BaseModel):
+    query: str
+    results: List[QuestionSearchResult]
+    next_cursor: Optional[str] = None  # pass as `cursor` to fetch the next page
 
 class UserAttemptResponse(BaseModel):
     attempt_id: int
@@ -51,6 +84,7 @@ class UserAttemptResponse(BaseModel):
 
 class AllUserAttemptsResponse(BaseModel):
     attempts: List[UserAttemptResponse]
+    next_after_id: Optional[int] = None  # pass as `after_id` to fetch the next page
 # -------------------------------
 # Database & Logic Functions
 # -------------------------------
@@ -59,67 +93,223 @@ def get_topics_list(db: Session) -> List[str]:
     """Fetch all unique topic names."""
     return [t[0] for t in db.query(Question.topic_name).distinct().all()]
 
-def get_questions_by_topic(db: Session, topic: str) -> List[QuestionResponse]:
-    """Fetch all questions for a specific topic."""
-    questions = db.query(Question).filter(Question.topic_name == topic).all()
-    if not questions:
-        return []
-
-    sanitized_questions = []
-    for q in questions:
-        sanitized_questions.append(
-            QuestionResponse(
-                id=q.id,
-                topic_name=q.topic_name,
-                text=q.text,
-                options={
-                    "A": q.option_a, "B": q.option_b,
-                    "C": q.option_c, "D": q.option_d
-                }
-            )
-        )
-    return sanitized_questions
-
-# Removed: get_next_attempt_id (not needed as we are not saving attempts)
-
-
-def process_quiz_submission(db: Session, topic: str, submission_data: List[SubmissionItem]) -> Dict:
-    """Process quiz submission and calculate score without saving attempts."""
+def grade_submission(
+    answer_keys: AnswerKeys, topic: str, submission_data: List[SubmissionItem], user_id: Optional[str] = None
+) -> Tuple[Dict, List[Dict]]:
+    """Grade one quiz submission; returns (results, attempt rows to persist)."""
     if not submission_data:
         raise HTTPException(status_code=400, detail="No answers provided.")
+    if not answer_keys.has_topic(topic):
+        raise HTTPException(status_code=404, detail=f"Topic '{topic}' not found or has no questions.")
+
+    # Ids from other topics and repeated ids are flagged in the results, not scored
+    outcomes = []
+    results = answer_keys.grade(topic, ((item.question_id, item.answer_key) for item in submission_data), outcomes)
+    if not results["total_questions"]:
+        raise HTTPException(status_code=400, detail=f"None of the submitted questions belong to topic '{topic}'.")
+
+    rows = [
+        {
+            "user_id": user_id,
+            "question_id": q_id,
+            "topic_name": topic,
+            "submitted_answer": answer,
+            "correct_answer": correct_key,
+            "is_correct": is_correct,
+        }
+        for q_id, answer, correct_key, is_correct in outcomes
+    ]
+    return results, rows
+
+
+def queue_attempts(rows: List[Dict]) -> None:
+    """Hand attempt rows to the writer thread, which group-commits them outside the request."""
+    try:
+        attempt_writer.submit(rows)
+    except AttemptQueueFull:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many submissions in flight, please retry.",
+            headers={"Retry-After": "1"},
+        )
 
-    # 1. Fetch correct answers from DB for the submitted question IDs
-    question_ids = [item.question_id for item in submission_data]
-    correct_answers = db.query(Question.id, Question.correct_answer_key)\
-                        .filter(Question.id.in_(question_ids)).all()
-    correct_map = {q_id: key for q_id, key in correct_answers}
-
-    # 2. Calculate score
-    correct_count = 0
-
-    for item in submission_data:
-        q_id = item.question_id
-        user_answer = item.answer_key.upper()
-        correct_key = correct_map.get(q_id)
-
-        # Score the question
-        if correct_key and user_answer == correct_key:
-            correct_count += 1
-            
-    # 3. Return results immediately (no database write/commit needed)
-    total_questions = len(submission_data)
-    return {
-        "topic": topic,
-        "score": correct_count,
-        "total_questions": total_questions,
-        "percentage": (correct_count / total_questions) * 100 if total_questions else 0
-    }
+
+def process_quiz_submission(topic: str, submission_data: List[SubmissionItem], user_id: Optional[str] = None) -> Dict:
+    """Grade a quiz submission and queue its attempts for a background write."""
+    answer_keys = answer_key_index.current(snapshot_store.current())
+    results, rows = grade_submission(answer_keys, topic, submission_data, user_id)
+    queue_attempts(rows)
+    return results
+
+
+def process_submission_batch(submissions: List[SubmissionRequest]) -> List[Union[Dict, HTTPException]]:
+    """
+    Grade a chunk of batch submissions against one AnswerKeys and queue all
+    their attempts with a single put, so backpressure rejects whole chunks
+    instead of random submissions in the middle of one.
+    Returns the results, or the HTTPException, for each submission in order.
+    """
+    answer_keys = answer_key_index.current(snapshot_store.current())
+    outcomes: List[Union[Dict, HTTPException]] = []
+    rows: List[Dict] = []
+    for submission in submissions:
+        try:
+            results, attempt_rows = grade_submission(
+                answer_keys, submission.topic_name, submission.answers, submission.user_id
+            )
+        except HTTPException as e:
+            outcomes.append(e)
+            continue
+        outcomes.append(results)
+        rows.extend(attempt_rows)
+    try:
+        queue_attempts(rows)
+    except HTTPException as e:
+        # Queue full: every graded submission of the chunk is rejected and can be retried together
+        outcomes = [e if isinstance(outcome, dict) else outcome for outcome in outcomes]
+    return outcomes
+
+
+# Upper bound for sampled quiz sizes, explicit id lists and page sizes
+MAX_QUIZ_QUESTIONS = 500
+
+
+def get_quiz_payload(
+    db: Session,
+    topic: str,
+    with_answers: bool,
+    count: Optional[int] = None,
+    seed: Optional[int] = None,
+    ids: Optional[List[int]] = None,
+    after_id: Optional[int] = None,
+    limit: Optional[int] = None,
+) -> EncodedBody:
+    """
+    Build the JSON body for a quiz endpoint in one of four modes:
+    the whole topic (cached), a random sample of `count` questions (same
+    `seed` -> same questions), an explicit `ids` list, or a keyset page of
+    `limit` questions after `after_id`. Only quizzes without answers make up
+    a seed; answers are only returned for a sample the caller can name.
+    """
+    not_found = HTTPException(status_code=404, detail=f"Topic '{topic}' not found or has no questions.")
+    if sum(mode is not None for mode in (count, ids, limit if limit is not None else after_id)) > 1:
+        raise HTTPException(status_code=400, detail="Use only one of `count`, `ids` or `limit`/`after_id`.")
+    if seed is not None and count is None:
+        raise HTTPException(status_code=400, detail="`seed` only applies to sampled quizzes; pass it with `count`.")
+    if with_answers and count is not None and seed is None:
+        raise HTTPException(status_code=400, detail="Pass the `seed` returned by /quizzes/start together with `count`.")
+
+    # One snapshot for the whole request, so sampled ids are read from the bank they came from
+    snapshot = snapshot_store.current()
+    answer_keys = answer_key_index.current(snapshot)
+    if count is not None or ids is not None:
+        if ids is None:
+            if seed is None:
+                seed = random.randrange(2**31)
+            # Sampled from the in-memory id array: O(count), no ORDER BY RANDOM()
+            ids = answer_keys.sample_question_ids(topic, count, seed)
+            if ids is None:
+                raise not_found
+        if snapshot is not None:
+            questions = question_dicts(topic, snapshot.rows_by_ids(topic, ids), with_answers)
+        else:
+            questions = fetch_questions_by_ids(db, topic, ids, with_answers)
+        if not questions and not answer_keys.has_topic(topic):
+            raise not_found
+        body = {"topic_name": topic, "questions": questions}
+        if count is not None:
+            body["seed"] = seed
+        return EncodedBody(dumps(body))
+
+    if limit is not None or after_id is not None:
+        if snapshot is not None:
+            rows, next_after_id = snapshot.topic_page(topic, after_id, limit or MAX_QUIZ_QUESTIONS)
+            questions = question_dicts(topic, rows, with_answers)
+        else:
+            questions, next_after_id = fetch_topic_page(db, topic, after_id, limit or MAX_QUIZ_QUESTIONS, with_answers)
+        if not questions and not answer_keys.has_topic(topic):
+            raise not_found
+        return EncodedBody(dumps({"topic_name": topic, "questions": questions, "next_after_id": next_after_id}))
+
+    payload = get_topic_payload(db, topic, snapshot)
+    if payload is None:
+        raise not_found
+    return payload.answers if with_answers else payload.questions
+
+
+def get_user_attempts(db: Session, user_id: str, after_id: Optional[int], limit: int) -> Dict:
+    """Fetch one page of a user's attempts, oldest first, using the attempt id as the cursor."""
+    query = (
+        select(
+            Attempt.id, Attempt.question_id, Attempt.topic_name, Question.text,
+            Attempt.submitted_answer, Attempt.correct_answer, Attempt.is_correct,
+        )
+        .outerjoin(Question, Question.id == Attempt.question_id)
+        .where(Attempt.user_id == user_id)
+        .order_by(Attempt.id)
+        .limit(limit)
+    )
+    if after_id is not None:
+        query = query.where(Attempt.id > after_id)
+
+    attempts = [
+        UserAttemptResponse(
+            attempt_id=a_id,
+            question_id=q_id,
+            topic_name=topic,
+            question_text=text or "",
+            submitted_answer=submitted,
+            correct_answer=correct,
+            is_correct=is_correct,
+        )
+        for a_id, q_id, topic, text, submitted, correct, is_correct in db.execute(query)
+    ]
+    next_after_id = attempts[-1].attempt_id if len(attempts) == limit else None
+    return {"attempts": attempts, "next_after_id": next_after_id}
 # -------------------------------
 # FastAPI App Setup
 # -------------------------------
-app = FastAPI(title="Quiz Backend for Verto")
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Per-worker startup/shutdown. Nothing touches the database at import time;
+    warm starts only read the schema stamp before loading the answer keys
+    (or mapping the shared snapshot, when QUIZ_SNAPSHOT_PATH is set).
+    """
+    timings = {}
+    started = time.perf_counter()
+    init_database()
+    ensure_snapshot()
+    timings["init_database_ms"] = (time.perf_counter() - started) * 1000
+
+    step = time.perf_counter()
+    # Build (or attach) the answer key index once so the first submission doesn't pay for it
+    answer_key_index.current(snapshot_store.current())
+    timings["answer_keys_ms"] = (time.perf_counter() - step) * 1000
+
+    attempt_writer.start()
+    timings["total_ms"] = (time.perf_counter() - started) * 1000
+    app.state.startup_timings = timings
+    for phase, ms in timings.items():
+        STARTUP_SECONDS.set(phase[:-len("_ms")], value=ms / 1000)
 
-setup_database()
+    message = "Startup finished in %.1f ms (database %.1f ms, answer keys %.1f ms)"
+    args = (timings["total_ms"], timings["init_database_ms"], timings["answer_keys_ms"])
+    if timings["total_ms"] > QUIZ_STARTUP_BUDGET_MS:
+        logger.warning(message + ", over the %.0f ms budget", *args, QUIZ_STARTUP_BUDGET_MS)
+    else:
+        logger.info(message, *args)
+
+    yield
+
+    # Drain queued attempts before the process exits
+    attempt_writer.stop()
+
+
+app = FastAPI(title="Quiz Backend for Verto", lifespan=lifespan)
 
 origins = [
     "http://localhost:4200",  # Angular dev server
@@ -132,58 +322,122 @@ app.add_middleware(
     allow_methods=["*"],         # Allow all HTTP methods (GET, POST, etc.)
     allow_headers=["*"],         # Allow all headers
 )
+# Outermost, so latency includes CORS handling and the full streamed body
+app.add_middleware(MetricsMiddleware)
 
 
 
 
 @app.get("/quizzes/results/{topic_name}", response_model=QuizForResultResponse)
-def get_quiz_for_results(topic_name: str, db: Session = Depends(get_db)):
-    """Return all questions for a topic with correct answers for result display"""
-    questions = db.query(Question).filter(Question.topic_name == topic_name).all()
-    if not questions:
-        raise HTTPException(status_code=404, detail=f"Topic '{topic_name}' not found or has no questions.")
-
-    questions_with_answers = [
-        QuestionWithAnswerResponse(
-            id=q.id,
-            topic_name=q.topic_name,
-            text=q.text,
-            options={
-                "A": q.option_a,
-                "B": q.option_b,
-                "C": q.option_c,
-                "D": q.option_d
-            },
-            correctAnswer=q.correct_answer_key
-        )
-        for q in questions
-    ]
-
-    return {"topic_name": topic_name, "questions": questions_with_answers}
+def get_quiz_for_results(
+    topic_name: str,
+    request: Request,
+    count: Optional[int] = Query(None, ge=1, le=MAX_QUIZ_QUESTIONS),
+    seed: Optional[int] = None,
+    ids: Optional[List[int]] = Query(None, max_length=MAX_QUIZ_QUESTIONS),
+    after_id: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_QUIZ_QUESTIONS),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Return questions for a topic with correct answers for result display.
+    Pass the `count` and `seed` (or the `ids`) of a sampled quiz to get back
+    only the questions that were served.
+    """
+    body = get_quiz_payload(db, topic_name, True, count, seed, ids, after_id, limit)
+    # Body is pre-serialized (and cached per topic for the full quiz); skip pydantic re-validation
+    return json_response(request, body)
 
 
 @app.get("/topics")
-def list_topics(db: Session = Depends(get_db)):
-    topics = get_topics_list(db)
-    return {"topics": topics}
+def list_topics(request: Request, db: Session = Depends(get_read_db)):
+    body = get_topics_body(lambda: get_topics_list(db), snapshot_store.current())
+    return json_response(request, body)
 
 @app.get("/quizzes/start/{topic_name}", response_model=QuizResponse)
-def get_quiz_questions(topic_name: str, db: Session = Depends(get_db)):
-    questions = get_questions_by_topic(db, topic_name)
-    if not questions:
-        raise HTTPException(status_code=404, detail=f"Topic '{topic_name}' not found or has no questions.")
-    return {"topic_name": topic_name, "questions": questions}
+def get_quiz_questions(
+    topic_name: str,
+    request: Request,
+    count: Optional[int] = Query(None, ge=1, le=MAX_QUIZ_QUESTIONS),
+    seed: Optional[int] = None,
+    after_id: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_QUIZ_QUESTIONS),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Return a topic's questions without answers: all of them by default,
+    `count` random ones (reproducible with `seed`), or a page of `limit`
+    questions after `after_id`.
+    """
+    body = get_quiz_payload(db, topic_name, False, count, seed, None, after_id, limit)
+    # A random quiz without a caller-supplied seed must not be cached
+    return json_response(request, body, cacheable=count is None or seed is not None)
 
 
 
 
 @app.post("/quizzes/submit")
-def submit_quiz(submission: SubmissionRequest, db: Session = Depends(get_db)):
-    results = process_quiz_submission(db, submission.topic_name, submission.answers)
+def submit_quiz(submission: SubmissionRequest):
+    results = process_quiz_submission(submission.topic_name, submission.answers, submission.user_id)
     return {
         "message": "Submission recorded successfully. Here are your results:",
         "results": results
     }
 
 
-
+@app.post("/quizzes/submit/batch")
+async def submit_quiz_batch(request: Request):
+    """
+    Grade many submissions in one request.
+    Body is a JSON array of SubmissionRequest objects or NDJSON (one per line);
+    results are streamed back as NDJSON: {"index": i, "results": {...}} or
+    {"index": i, "error": ...} per submission, in input order.
+    """
+    return RequestStreamingResponse(
+        stream_batch_results(
+            request.stream(),
+            SubmissionRequest,
+            process_submission_batch,
+        ),
+        media_type="application/x-ndjson",
+    )
+
+
+@app.get("/attempts", response_model=AllUserAttemptsResponse)
+def list_user_attempts(
+    user_id: str,
+    after_id: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Return a user's saved attempts, paginated by attempt id.
+    Attempts are written in the background, so a just-submitted quiz can take
+    up to a flush interval to show up here.
+    """
+    return get_user_attempts(db, user_id, after_id, limit)
+
+
+@app.get("/questions/search", response_model=QuestionSearchResponse)
+def search_question_bank(
+    q: str = Query(..., min_length=1, max_length=200),
+    topic: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Ranked full-text search over question text and options (answers are not
+    included). Filter with `topic`; page with the returned `next_cursor`.
+    """
+    try:
+        results, next_cursor = search_questions(db, q, topic, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"query": q, "results": results, "next_cursor": next_cursor}
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    """Prometheus text exposition of request, SQL and pool metrics for this worker."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
@@ -1,10 +1,12 @@
 
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Index, Integer, String, func
 from app.core.database import Base 
 
 class Question(Base):
 
     __tablename__ = "questions"
+    # Importer upserts rely on this to dedupe questions without per-row lookups
+    __table_args__ = (Index("uq_questions_topic_text", "topic_name", "text", unique=True),)
 
     id = Column(Integer, primary_key=True, index=True)
     topic_name = Column(String, index=True, nullable=False) 
@@ -21,3 +23,24 @@ class Question(Base):
     def __repr__(self):
         return f"<Question(topic='{self.topic_name}', text='{self.text[:30]}...')>"
 
+
+class Attempt(Base):
+
+    __tablename__ = "attempts"
+    # Keyset pagination walks a user's attempts in id order
+    __table_args__ = (Index("ix_attempts_user_id_id", "user_id", "id"),)
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(String, nullable=True)
+    question_id = Column(Integer, ForeignKey("questions.id"), nullable=False)
+    topic_name = Column(String, nullable=False)
+
+    submitted_answer = Column(String, nullable=False)
+    correct_answer = Column(String, nullable=False)
+    is_correct = Column(Boolean, nullable=False)
+    created_at = Column(DateTime, server_default=func.current_timestamp(), nullable=False)
+
+
+    def __repr__(self):
+        return f"<Attempt(user='{self.user_id}', question_id={self.question_id}, is_correct={self.is_correct})>"
+
@@ -0,0 +1,215 @@
+# bench/run.py
+"""
+Benchmark harness for the quiz API.
+
+Usage:
+    python -m bench.run --topics 1000 --questions 1000 --requests 2000 --concurrency 32
+    python -m bench.run --mode uvicorn --workers 4 --out results.json
+
+Generates a synthetic bank into a temporary SQLite file, then drives every
+endpoint in-process (ASGI transport, no sockets) and/or against a local
+uvicorn server, and prints throughput and p50/p95/p99 latency as JSON.
+Compare two result files to spot regressions.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Tuple
+
+import httpx
+
+from bench.synth import generate_bank
+
+# (method, url, json body or None)
+RequestSpec = Tuple[str, str, object]
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def _summarize(latencies: List[float], errors: int, wall: float) -> Dict:
+    latencies.sort()
+    return {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "throughput_rps": round((len(latencies) + errors) / wall, 1) if wall else 0.0,
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+            "p50": round(_percentile(latencies, 50) * 1000, 3),
+            "p95": round(_percentile(latencies, 95) * 1000, 3),
+            "p99": round(_percentile(latencies, 99) * 1000, 3),
+            "max": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+        },
+    }
+
+
+async def _drive(client: httpx.AsyncClient, make_request: Callable[[random.Random], RequestSpec],
+                 total: int, concurrency: int, seed: int) -> Dict:
+    """Send `total` requests with at most `concurrency` in flight."""
+    latencies: List[float] = []
+    errors = 0
+    remaining = iter(range(total))
+
+    async def worker(worker_id: int):
+        nonlocal errors
+        rng = random.Random(seed * 1000 + worker_id)
+        for _ in remaining:
+            method, url, body = make_request(rng)
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, json=body)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            elapsed = time.perf_counter() - started
+            if ok:
+                latencies.append(elapsed)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return _summarize(latencies, errors, time.perf_counter() - started)
+
+
+def _scenarios(topic_ranges: Dict[str, Tuple[int, int]], sample_size: int) -> Dict[str, Callable]:
+    """One request factory per endpoint; topics and ids are picked at random."""
+    topics = list(topic_ranges)
+
+    def submit(rng):
+        topic = rng.choice(topics)
+        first_id, last_id = topic_ranges[topic]
+        ids = rng.sample(range(first_id, last_id + 1), min(sample_size, last_id - first_id + 1))
+        answers = [{"question_id": q_id, "answer_key": rng.choice("ABCD")} for q_id in ids]
+        return "POST", "/quizzes/submit", {"topic_name": topic, "answers": answers, "user_id": "bench"}
+
+    return {
+        "topics": lambda rng: ("GET", "/topics", None),
+        "start": lambda rng: ("GET", f"/quizzes/start/{rng.choice(topics)}", None),
+        "start_sampled": lambda rng: ("GET", f"/quizzes/start/{rng.choice(topics)}?count={sample_size}&seed={rng.randrange(2**31)}", None),
+        "results": lambda rng: ("GET", f"/quizzes/results/{rng.choice(topics)}", None),
+        "submit": submit,
+    }
+
+
+async def _run_scenarios(client: httpx.AsyncClient, scenarios: Dict[str, Callable], args) -> Dict:
+    results = {}
+    for name, make_request in scenarios.items():
+        if args.warmup:
+            await _drive(client, make_request, args.warmup, args.concurrency, args.seed)
+        results[name] = await _drive(client, make_request, args.requests, args.concurrency, args.seed)
+        print(f"  {name:<14} {results[name]['throughput_rps']:>10,.1f} req/s  "
+              f"p99 {results[name]['latency_ms']['p99']:.2f} ms", file=sys.stderr)
+    return results
+
+
+async def run_inprocess(scenarios, args) -> Dict:
+    from app.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            return await _run_scenarios(client, scenarios, args)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def run_uvicorn(scenarios, args) -> Dict:
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(args.workers), "--log-level", "warning"],
+        env=os.environ.copy(),
+    )
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as client:
+            deadline = time.monotonic() + 60
+            while True:
+                try:
+                    if (await client.get("/topics")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if time.monotonic() > deadline or server.poll() is not None:
+                    raise RuntimeError("uvicorn did not start")
+                await asyncio.sleep(0.2)
+            return await _run_scenarios(client, scenarios, args)
+    finally:
+        server.terminate()
+        server.wait(30)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the quiz API against a synthetic bank.")
+    parser.add_argument("--topics", type=int, default=100)
+    parser.add_argument("--questions", type=int, default=1000, help="questions per topic")
+    parser.add_argument("--requests", type=int, default=1000, help="measured requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=100, help="unmeasured requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--sample-size", type=int, default=20, help="questions per sampled quiz / submission")
+    parser.add_argument("--mode", choices=("inprocess", "uvicorn", "both"), default="both")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--db", help="reuse/create the bank at this path instead of a temporary file")
+    parser.add_argument("--out", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="quiz-bench-") as tmp:
+        db_path = args.db or os.path.join(tmp, "bench.db")
+        print(f"Generating {args.topics} x {args.questions} questions into {db_path}", file=sys.stderr)
+        stats = generate_bank(db_path, args.topics, args.questions, args.seed)
+
+        with sqlite3.connect(db_path) as conn:
+            topic_ranges = {
+                topic: (first_id, last_id)
+                for topic, first_id, last_id in conn.execute(
+                    "SELECT topic_name, MIN(id), MAX(id) FROM questions GROUP BY topic_name"
+                )
+            }
+        scenarios = _scenarios(topic_ranges, args.sample_size)
+
+        report = {
+            "config": {key: value for key, value in vars(args).items() if key != "out"},
+            "environment": {"python": platform.python_version(), "platform": platform.platform(),
+                            "cpu_count": os.cpu_count()},
+            "bank": {"questions": stats.total_questions, "import_seconds": round(stats.seconds, 3),
+                     "import_rows_per_sec": round(stats.rows_per_sec, 1)},
+            "results": {},
+        }
+        if args.mode in ("inprocess", "both"):
+            print("in-process:", file=sys.stderr)
+            report["results"]["inprocess"] = asyncio.run(run_inprocess(scenarios, args))
+        if args.mode in ("uvicorn", "both"):
+            print(f"uvicorn ({args.workers} worker(s)):", file=sys.stderr)
+            report["results"]["uvicorn"] = asyncio.run(run_uvicorn(scenarios, args))
+
+    output = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
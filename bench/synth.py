@@ -0,0 +1,69 @@
+# bench/synth.py
+"""
+Synthetic question-bank generator for benchmarks.
+
+Usage:
+    python -m bench.synth /tmp/bank.db --topics 1000 --questions 1000
+
+Questions are generated lazily and written through the bulk importer, so
+banks of millions of rows never sit in memory.
+"""
+
+import argparse
+import os
+import random
+import sys
+from typing import Dict, Iterator
+
+
+def iter_synthetic_questions(topics: int, questions_per_topic: int, seed: int = 0) -> Iterator[Dict]:
+    """Deterministic rows in importer format: `topics` x `questions_per_topic`."""
+    rng = random.Random(seed)
+    for t in range(topics):
+        topic_name = f"Topic {t:05d}"
+        for q in range(questions_per_topic):
+            yield {
+                "topic_name": topic_name,
+                "text": f"Synthetic question {q} of {topic_name}: pick the value of {rng.randrange(10**6)}?",
+                "option_a": f"Option A {rng.randrange(10**6)}",
+                "option_b": f"Option B {rng.randrange(10**6)}",
+                "option_c": f"Option C {rng.randrange(10**6)}",
+                "option_d": f"Option D {rng.randrange(10**6)}",
+                "correct_answer_key": rng.choice("ABCD"),
+            }
+
+
+def generate_bank(db_path: str, topics: int, questions_per_topic: int, seed: int = 0):
+    """
+    Create (or extend) a SQLite question bank at `db_path` and initialize it
+    like the app would on first start. Must run before any `app` module is
+    imported in this process, because the engine reads QUIZ_DATABASE_URL once.
+    """
+    os.environ["QUIZ_DATABASE_URL"] = f"sqlite:///{db_path}"
+    from app.core.database import init_database
+    from app.core.importer import import_questions
+
+    # Import first so init_database() finds a non-empty bank and skips the sample seed
+    stats = import_questions(iter_synthetic_questions(topics, questions_per_topic, seed))
+    init_database()
+    return stats
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Generate a synthetic quiz question bank.")
+    parser.add_argument("db_path", help="SQLite file to create")
+    parser.add_argument("--topics", type=int, default=100)
+    parser.add_argument("--questions", type=int, default=1000, help="questions per topic")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    stats = generate_bank(args.db_path, args.topics, args.questions, args.seed)
+    print(
+        f"Generated {stats.total_questions:,} questions in {stats.seconds:.2f}s "
+        f"({stats.rows_per_sec:,.0f} rows/sec) at {args.db_path}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
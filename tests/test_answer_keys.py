@@ -0,0 +1,143 @@
+# tests/test_answer_keys.py
+#
+# Run with: python -m pytest tests
+
+import os
+
+# Keep app.core.database away from the default ./anup.db; the index is pointed
+# at a temporary database below
+os.environ.setdefault("QUIZ_DATABASE_URL", "sqlite://")
+
+import pytest
+from sqlalchemy import create_engine, delete, insert, text, update
+
+from app.core import answer_keys, bank, config
+from app.core.answer_keys import AnswerKeyIndex
+from app.core.bank import create_change_log
+from app.models.models import Question
+
+QUESTIONS = [
+    ("SQL", "What does SQL stand for?", "A"),
+    ("Python", "Which keyword defines a function?", "B"),
+    ("SQL", "Which clause filters rows?", "C"),
+    ("Géographie", "Capitale du Japon ?", "D"),
+    ("SQL", "Which join keeps unmatched left rows?", "B"),
+]
+
+
+def _question(topic, text, key):
+    return dict(topic_name=topic, text=text, option_a="a", option_b="b", option_c="c", option_d="d", correct_answer_key=key)
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'bank.db'}")
+    Question.__table__.create(engine)
+    create_change_log(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(Question), [_question(*row) for row in QUESTIONS])
+    # Same engine for the version reads and the refresh queries; re-read the version on every call
+    monkeypatch.setattr(bank, "read_engine", engine)
+    monkeypatch.setattr(answer_keys, "read_engine", engine)
+    monkeypatch.setattr(config, "QUIZ_BANK_VERSION_TTL", 0)
+    yield engine
+    engine.dispose()
+    bank.expire_bank_version()
+
+
+@pytest.fixture
+def index(db, monkeypatch):
+    index = AnswerKeyIndex()
+    index.load()
+    # Count full reloads, so tests can tell them apart from incremental refreshes
+    index.full_loads = 0
+    load = index.load
+
+    def counting_load():
+        index.full_loads += 1
+        return load()
+
+    monkeypatch.setattr(index, "load", counting_load)
+    return index
+
+
+def _ids(state, topic):
+    return list(state.topic_questions[state.topic_ids[topic]]) if topic in state.topic_ids else []
+
+
+def test_unchanged_bank_keeps_the_same_state(index):
+    state = index.current()
+    assert index.current() is state
+    assert _ids(state, "SQL") == [1, 3, 5]
+
+
+def test_question_moved_between_topics(db, index):
+    before = index.current()
+    with db.begin() as conn:
+        conn.execute(update(Question).where(Question.id == 3).values(topic_name="Python", correct_answer_key="A"))
+
+    after = index.current()
+    assert index.full_loads == 0
+    assert after.version > before.version
+    assert _ids(after, "SQL") == [1, 5]
+    assert _ids(after, "Python") == [2, 3]
+    assert after.grade("Python", [(3, "A")])["score"] == 1
+    assert after.grade("SQL", [(3, "C")])["invalid_question_ids"] == [3]
+
+
+def test_new_topic_and_deletes(db, index):
+    with db.begin() as conn:
+        conn.execute(insert(Question), [_question("Astronomy", "Closest star?", "A")])
+        conn.execute(delete(Question).where(Question.id.in_([2, 4])))
+
+    state = index.current()
+    assert index.full_loads == 0
+    assert _ids(state, "Astronomy") == [6]
+    assert not state.has_topic("Python") and not state.has_topic("Géographie")
+    assert state.sample_question_ids("Python", 3, seed=1) is None
+    assert state.grade("Python", [(2, "B")])["invalid_question_ids"] == [2]
+    assert state.grade("Astronomy", [(6, "a")])["score"] == 1
+
+
+def test_refresh_swaps_in_a_copy(db, index):
+    before = index.current()
+    with db.begin() as conn:
+        conn.execute(update(Question).where(Question.id == 1).values(correct_answer_key="D"))
+        conn.execute(delete(Question).where(Question.id == 5))
+
+    after = index.current()
+    assert after is not before
+    # A request still holding the previous state keeps grading against it unchanged
+    assert before.grade("SQL", [(1, "A"), (5, "B")])["score"] == 2
+    assert _ids(before, "SQL") == [1, 3, 5]
+    results = after.grade("SQL", [(1, "D"), (5, "B")])
+    assert results["score"] == 1 and results["invalid_question_ids"] == [5]
+    assert _ids(after, "SQL") == [1, 3]
+    # Only the touched topic's id array is copied; the others are shared
+    assert after.topic_questions[after.topic_ids["SQL"]] is not before.topic_questions[before.topic_ids["SQL"]]
+    assert after.topic_questions[after.topic_ids["Python"]] is before.topic_questions[before.topic_ids["Python"]]
+
+
+def test_pruned_log_falls_back_to_a_full_reload(db, index):
+    before = index.current()
+    with db.begin() as conn:
+        conn.execute(update(Question).where(Question.id == 2).values(correct_answer_key="C"))
+        conn.execute(update(Question).where(Question.id == 4).values(topic_name="Geography"))
+        # What the prune trigger does once the log outgrows BANK_CHANGES_KEEP
+        conn.execute(text("DELETE FROM bank_changes WHERE version <= :v"), {"v": before.version + 1})
+
+    state = index.current()
+    assert index.full_loads == 1
+    assert state.grade("Python", [(2, "C")])["score"] == 1
+    assert _ids(state, "Geography") == [4]
+    assert not state.has_topic("Géographie")
+
+
+def test_large_change_falls_back_to_a_full_reload(db, index, monkeypatch):
+    monkeypatch.setattr(answer_keys, "REFRESH_FULL_RELOAD_THRESHOLD", 2)
+    with db.begin() as conn:
+        conn.execute(update(Question).values(correct_answer_key="A"))
+
+    state = index.current()
+    assert index.full_loads == 1
+    assert state.grade("SQL", [(1, "A"), (3, "A"), (5, "A")])["score"] == 3
@@ -0,0 +1,134 @@
+# tests/test_batch.py
+#
+# Run with: python -m pytest tests
+
+import asyncio
+import json
+import os
+
+os.environ.setdefault("QUIZ_DATABASE_URL", "sqlite://")
+
+import pytest
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+from app.core.batch import MalformedDocument, iter_json_documents, stream_batch_results
+
+DOCUMENTS = [
+    {"topic_name": "SQL", "answers": [{"question_id": 1, "answer_key": "A"}]},
+    {"topic_name": "Géographie 東京", "answers": [], "flag": True, "none": None},
+    {"topic_name": "Python", "score": -1.5e-3, "escaped": "quote \" and \\u00e9 é"},
+]
+
+
+async def _chunks(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+def _decode(data: bytes, size: int):
+    async def collect():
+        return [item async for item in iter_json_documents(_chunks(data, size))]
+    return asyncio.run(collect())
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, 10_000])
+def test_array_split_anywhere(size):
+    body = json.dumps(DOCUMENTS, ensure_ascii=False).encode("utf-8")
+    assert _decode(body, size) == list(enumerate(DOCUMENTS))
+
+
+@pytest.mark.parametrize("size", [1, 5, 10_000])
+def test_ndjson_split_anywhere(size):
+    body = ("\n".join(json.dumps(d, ensure_ascii=False) for d in DOCUMENTS) + "\r\n\n").encode("utf-8")
+    assert _decode(body, size) == list(enumerate(DOCUMENTS))
+
+
+def test_ndjson_without_trailing_newline():
+    body = "\n".join(json.dumps(d) for d in DOCUMENTS).encode()
+    assert _decode(body, 4) == list(enumerate(DOCUMENTS))
+
+
+def test_empty_bodies():
+    assert _decode(b"", 10) == []
+    assert _decode(b"  \n ", 1) == []
+    assert _decode(b"[ ]", 1) == []
+
+
+@pytest.mark.parametrize("size", [1, 16, 10_000])
+def test_ndjson_bad_line_in_the_middle(size):
+    lines = [json.dumps(DOCUMENTS[0]), '{"topic_name": oops}', json.dumps(DOCUMENTS[1]), "[1, 2", json.dumps(DOCUMENTS[2])]
+    decoded = _decode("\n".join(lines).encode(), size)
+    assert [index for index, _ in decoded] == [0, 1, 2, 3, 4]
+    assert decoded[0][1] == DOCUMENTS[0]
+    assert isinstance(decoded[1][1], MalformedDocument)
+    assert "line 2" in decoded[1][1].error
+    assert decoded[2][1] == DOCUMENTS[1]
+    assert isinstance(decoded[3][1], MalformedDocument)
+    assert decoded[4][1] == DOCUMENTS[2]
+
+
+@pytest.mark.parametrize("size", [1, 7, 10_000])
+def test_cut_off_array(size):
+    body = json.dumps(DOCUMENTS).encode()
+    with pytest.raises(json.JSONDecodeError):
+        _decode(body[:-1], size)  # missing "]"
+    with pytest.raises(json.JSONDecodeError):
+        _decode(body[: len(body) // 2], size)  # cut mid-document
+
+
+def test_malformed_array_fails_without_reading_the_rest():
+    read = []
+
+    async def chunks():
+        yield b'[{"topic_name": oops}, '
+        for i in range(10_000):
+            read.append(i)
+            yield json.dumps(DOCUMENTS[0]).encode() + b", "
+
+    async def collect():
+        return [item async for item in iter_json_documents(chunks())]
+
+    with pytest.raises(json.JSONDecodeError):
+        asyncio.run(collect())
+    assert len(read) <= 1
+
+
+class _Submission(BaseModel):
+    topic_name: str
+
+
+def _grade(submissions):
+    return [
+        HTTPException(404, f"Topic '{s.topic_name}' not found") if s.topic_name == "missing" else {"topic": s.topic_name}
+        for s in submissions
+    ]
+
+
+def _stream(body: bytes, chunk_size: int = 3):
+    async def collect():
+        return [
+            line
+            async for part in stream_batch_results(_chunks(body, 1000), _Submission, _grade, chunk_size=chunk_size)
+            for line in part.decode().splitlines()
+        ]
+    return [json.loads(line) for line in asyncio.run(collect())]
+
+
+def test_stream_keeps_grading_after_a_bad_line():
+    lines = ['{"topic_name": "SQL"}', '{"topic_name": oops}', '{"nope": 1}', '{"topic_name": "missing"}']
+    lines += ['{"topic_name": "T%d"}' % i for i in range(2_000)]
+    results = _stream("\n".join(lines).encode())
+
+    assert [r["index"] for r in results] == list(range(len(lines)))
+    assert results[0] == {"index": 0, "results": {"topic": "SQL"}}
+    assert "Malformed JSON" in results[1]["error"]
+    assert results[2]["error"][0]["loc"] == ["topic_name"]
+    assert results[3]["error"] == "Topic 'missing' not found"
+    assert results[-1] == {"index": len(lines) - 1, "results": {"topic": "T1999"}}
+
+
+def test_stream_reports_a_cut_off_array_last():
+    results = _stream(b'[{"topic_name": "SQL"}, {"topic_name": "Py')
+    assert results[0] == {"index": 0, "results": {"topic": "SQL"}}
+    assert results[-1]["error"].startswith("Malformed batch body")
@@ -0,0 +1,57 @@
+# tests/test_importer.py
+#
+# Run with: python -m pytest tests
+
+import json
+import logging
+import os
+
+os.environ.setdefault("QUIZ_DATABASE_URL", "sqlite://")
+
+import pytest
+from sqlalchemy import create_engine, select
+
+from app.core.importer import InvalidRow, import_questions, iter_jsonl, normalize_row
+from app.models.models import Question
+
+GOOD = {"topic_name": "SQL", "text": "Which clause filters rows?", "option_a": "ORDER BY",
+        "option_b": "GROUP BY", "option_c": "WHERE", "option_d": "LIMIT", "correct_answer_key": "C"}
+NESTED = {"topic_name": "SQL", "text": "What does SQL stand for?", "correctAnswer": "a",
+          "options": {"A": "Structured Query Language", "B": "Simple Query", "C": "Sequel", "D": "Other"}}
+
+
+@pytest.fixture
+def bank(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'bank.db'}")
+    yield engine
+    engine.dispose()
+
+
+def test_normalize_row_rejects_wrong_shapes():
+    assert normalize_row(NESTED)["correct_answer_key"] == "A"
+    assert normalize_row(dict(NESTED, options=["1", "2", "3", "4"])) is None
+    assert normalize_row([GOOD]) is None
+    assert normalize_row(dict(GOOD, correct_answer_key="E")) is None
+
+
+def test_bad_jsonl_lines_are_skipped_with_their_line_number(bank, tmp_path, caplog):
+    path = tmp_path / "bank.jsonl"
+    path.write_text("\n".join([
+        json.dumps(GOOD),
+        json.dumps(dict(NESTED, text="List options?", options=["1", "2", "3", "4"])),
+        "[1, 2, 3]",
+        '{"topic_name": oops}',
+        "",
+        '"just a string"',
+        json.dumps(NESTED),
+    ]) + "\n", encoding="utf-8")
+
+    invalid = [row for row in iter_jsonl(str(path)) if isinstance(row, InvalidRow)]
+    assert [row.location for row in invalid] == [f"{path}:{n}" for n in (2, 3, 4, 6)]
+
+    with caplog.at_level(logging.WARNING):
+        stats = import_questions(iter_jsonl(str(path)), chunk_size=1, bind=bank)
+    assert (stats.read, stats.skipped, stats.written, stats.inserted) == (6, 4, 2, 2)
+    assert f"{path}:4" in caplog.text
+    with bank.connect() as conn:
+        assert sorted(conn.scalars(select(Question.text))) == [NESTED["text"], GOOD["text"]]
@@ -0,0 +1,234 @@
+# tests/test_snapshot.py
+#
+# Run with: python -m pytest tests
+
+import gzip
+import json
+import os
+import shutil
+import struct
+
+# Keep app.core.database away from the default ./anup.db; the tests build
+# their snapshots from their own temporary databases
+os.environ.setdefault("QUIZ_DATABASE_URL", "sqlite://")
+
+import pytest
+from sqlalchemy import create_engine, delete, insert
+
+from app.core.http_cache import EncodedBody
+from app.core.quizzes import dumps, question_dicts
+from app.core.snapshot import HEADER, Snapshot, SnapshotStore, build_snapshot
+from app.models.models import Question
+
+QUESTIONS = [
+    ("SQL", "What does SQL stand for?", "Structured Query Language", "Simple Query", "Sequel", "Other", "A"),
+    ("Python", "Which keyword defines a function?", "func", "def", "lambda", "fn", "B"),
+    ("SQL", "Which clause filters rows?", "ORDER BY", "GROUP BY", "WHERE", "LIMIT", "C"),
+    ("Géographie", "Capitale du Japon ? 東京", "Kyoto", "Osaka", "Nagoya", "Tokyo", "D"),
+    ("SQL", "Which join keeps unmatched left rows?", "INNER", "LEFT", "CROSS", "SELF", "B"),
+]
+
+
+def _rows(topic=None):
+    """Expected QUESTION_COLUMNS rows (ids are 1-based insertion order)."""
+    return [
+        (q_id, text, a, b, c, d, key)
+        for q_id, (row_topic, text, a, b, c, d, key) in enumerate(QUESTIONS, start=1)
+        if topic is None or row_topic == topic
+    ]
+
+
+@pytest.fixture
+def bank(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'bank.db'}")
+    Question.__table__.create(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(Question), [
+            dict(zip(("topic_name", "text", "option_a", "option_b", "option_c", "option_d", "correct_answer_key"), row))
+            for row in QUESTIONS
+        ])
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def snapshot(bank, tmp_path):
+    path = str(tmp_path / "bank.snap")
+    build_snapshot(path, bind=bank)
+    return Snapshot(path)
+
+
+def test_topics_and_rows(snapshot):
+    assert snapshot.topics == ["Géographie", "Python", "SQL"]
+    assert snapshot.question_count == len(QUESTIONS)
+    for row in _rows():
+        assert snapshot.row(row[0]) == row
+    assert snapshot.row(0) is None
+    assert snapshot.row(len(QUESTIONS) + 1) is None
+
+
+def test_rows_by_ids_keeps_order_and_filters(snapshot):
+    # 2 is a Python question, 99 doesn't exist, 5 is repeated
+    assert [row[0] for row in snapshot.rows_by_ids("SQL", [5, 2, 1, 99, 5, 3])] == [5, 1, 3]
+    assert snapshot.rows_by_ids("Unknown", [1, 2]) == []
+
+
+def test_topic_page(snapshot):
+    rows, next_after_id = snapshot.topic_page("SQL", None, 2)
+    assert [row[0] for row in rows] == [1, 3]
+    assert next_after_id == 3
+    rows, next_after_id = snapshot.topic_page("SQL", next_after_id, 2)
+    assert rows == _rows("SQL")[2:]
+    assert next_after_id is None
+    assert snapshot.topic_page("Unknown", None, 2) == ([], None)
+
+
+def test_topic_bodies_match_database_encoding(snapshot):
+    questions, answers = snapshot.topic_bodies("SQL")
+    for body, with_answers in ((questions, False), (answers, True)):
+        expected = dumps({"topic_name": "SQL", "questions": question_dicts("SQL", _rows("SQL"), with_answers)})
+        assert bytes(body.body) == expected
+        # Same ETag as the non-snapshot cache, so clients can switch modes without refetching
+        assert body.etag == EncodedBody(expected).etag
+        if "gzip" in body.encoded:
+            assert gzip.decompress(bytes(body.encoded["gzip"])) == expected
+    assert snapshot.topic_bodies("Unknown") is None
+
+    topics = snapshot.topics_body
+    assert json.loads(bytes(topics.body)) == {"topics": snapshot.topics}
+
+
+def test_answer_keys_grade_against_snapshot(snapshot):
+    answer_keys = snapshot.answer_keys
+    assert answer_keys.has_topic("SQL") and not answer_keys.has_topic("Unknown")
+    results = answer_keys.grade("SQL", [(1, "a"), (3, "B"), (2, "B"), (1, "A"), (99, "A")])
+    assert results["score"] == 1
+    assert results["total_questions"] == 2
+    assert results["invalid_question_ids"] == [2, 99]
+    assert results["duplicate_question_ids"] == [1]
+    sample = answer_keys.sample_question_ids("SQL", 2, seed=7)
+    assert sample == answer_keys.sample_question_ids("SQL", 2, seed=7)
+    assert set(sample) <= {1, 3, 5}
+
+
+def test_id_gaps(bank, tmp_path):
+    with bank.begin() as conn:
+        conn.execute(delete(Question).where(Question.id == 3))
+    path = str(tmp_path / "gaps.snap")
+    build_snapshot(path, bind=bank)
+    snapshot = Snapshot(path)
+    assert snapshot.row(3) is None
+    assert [row[0] for row in snapshot.topic_page("SQL", None, 10)[0]] == [1, 5]
+    assert snapshot.row(5) == _rows()[4]
+
+
+def test_empty_bank(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'empty.db'}")
+    Question.__table__.create(engine)
+    path = str(tmp_path / "empty.snap")
+    stats = build_snapshot(path, bind=engine)
+    engine.dispose()
+
+    snapshot = Snapshot(path)
+    assert stats["questions"] == 0
+    assert snapshot.topics == []
+    assert snapshot.row(1) is None
+    assert snapshot.topic_page("SQL", None, 10) == ([], None)
+    assert snapshot.topic_bodies("SQL") is None
+    assert json.loads(bytes(snapshot.topics_body.body)) == {"topics": []}
+    assert snapshot.answer_keys.grade("SQL", [(1, "A")])["invalid_question_ids"] == [1]
+
+
+def test_store_remaps_after_replace(bank, tmp_path):
+    path = str(tmp_path / "live.snap")
+    build_snapshot(path, bind=bank)
+    store = SnapshotStore(path, check_interval=0)
+    first = store.current()
+    assert store.current() is first
+
+    with bank.begin() as conn:
+        conn.execute(insert(Question), [dict(
+            topic_name="Astronomy", text="Closest star?", option_a="Sun", option_b="Sirius",
+            option_c="Vega", option_d="Polaris", correct_answer_key="A",
+        )])
+    build_snapshot(path, bind=bank)  # published with os.replace
+
+    second = store.current()
+    assert second is not first
+    assert "Astronomy" in second.topics
+    assert second.row(len(QUESTIONS) + 1)[1] == "Closest star?"
+    # The previous mapping stays readable for requests still holding it
+    assert "Astronomy" not in first.topics
+    assert first.row(1) == _rows()[0]
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "not-a.snap"
+    path.write_bytes(b"\0" * 512)
+    with pytest.raises(ValueError):
+        Snapshot(str(path))
+
+
+# Leading HEADER fields, to poke at single values in a built file
+HEADER_FIELDS = [
+    ("magic", "8s"), ("version", "I"), ("byte_order", "I"), ("topic_count", "I"), ("question_count", "I"),
+    ("max_id", "I"), ("file_size", "Q"), ("keys_off", "Q"), ("topic_of_off", "Q"), ("position_off", "Q"),
+    ("topic_ids_off", "Q"), ("topics_off", "Q"), ("records_off", "Q"), ("heap_off", "Q"),
+]
+
+
+def _field(field):
+    """(format, offset) of a header field."""
+    formats = [fmt for _, fmt in HEADER_FIELDS]
+    index = [name for name, _ in HEADER_FIELDS].index(field)
+    return "<" + formats[index], struct.calcsize("<" + "".join(formats[:index]))
+
+
+def _corrupted(snapshot, tmp_path, edit):
+    data = bytearray(open(snapshot.path, "rb").read())
+    edit(data)
+    path = tmp_path / "corrupt.snap"
+    path.write_bytes(bytes(data))
+    return str(path)
+
+
+@pytest.mark.parametrize("keep", [0, 16, HEADER.size, 200, -1])
+def test_rejects_truncated_files(snapshot, tmp_path, keep):
+    path = tmp_path / "truncated.snap"
+    data = open(snapshot.path, "rb").read()
+    path.write_bytes(data[:keep])
+    with pytest.raises(ValueError):
+        Snapshot(str(path))
+
+
+@pytest.mark.parametrize("field", ["file_size", "topic_ids_off", "records_off", "heap_off", "question_count", "max_id"])
+def test_rejects_offsets_outside_the_file(snapshot, tmp_path, field):
+    def edit(data):
+        fmt, offset = _field(field)
+        struct.pack_into(fmt, data, offset, len(data) + 1)
+    with pytest.raises(ValueError):
+        Snapshot(_corrupted(snapshot, tmp_path, edit))
+
+
+def test_rejects_topic_records_outside_the_heap(snapshot, tmp_path):
+    def edit(data):
+        fmt, offset = _field("topics_off")
+        topics_off = struct.unpack_from(fmt, data, offset)[0]
+        struct.pack_into("<Q", data, topics_off, len(data))  # first topic's name offset
+    with pytest.raises(ValueError):
+        Snapshot(_corrupted(snapshot, tmp_path, edit))
+
+
+def test_store_keeps_previous_snapshot_when_new_file_is_corrupt(bank, tmp_path):
+    path = str(tmp_path / "live.snap")
+    build_snapshot(path, bind=bank)
+    store = SnapshotStore(path, check_interval=0)
+    first = store.current()
+
+    broken = tmp_path / "broken.snap"
+    shutil.copyfile(path, broken)
+    with open(broken, "r+b") as f:
+        f.truncate(os.path.getsize(path) // 2)
+    os.replace(broken, path)
+
+    assert store.current() is first